@@ -0,0 +1,291 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import sys
+import time
+
+DEFAULT_STORE = os.path.join(os.path.expanduser("~"), ".cache", "hw1_bench", "results.jsonl")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """blake2b digest of a file's contents, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def as_list(value):
+    """Benchmark results hold either one measurement or a list of repeats."""
+    if value is None:
+        return []
+    return list(value) if isinstance(value, list) else [value]
+
+
+def record_results(store_path, results, dataset, binaries, run_id=None, label=None):
+    """Append one store entry per benchmark result and return the run id.
+
+    results are the records written by q1/bench_support.py or
+    q2/bench_miners.py; binaries maps an algorithm name to the program that
+    ran it. Each entry carries the dataset and binary hashes, the host and
+    a timestamp, so runs can be compared later.
+    """
+    timestamp = time.time()
+    run_id = run_id or time.strftime("%Y%m%d-%H%M%S", time.localtime(timestamp)) + f"-{os.getpid()}"
+    dataset_hash = file_hash(dataset)
+    binary_hashes = {}
+    for algorithm, path in binaries.items():
+        resolved = path if os.sep in path else shutil.which(path) or path
+        binary_hashes[algorithm] = file_hash(resolved) if os.path.exists(resolved) else None
+
+    os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+    with open(store_path, 'a') as f:
+        for result in results:
+            algorithm = result["algorithm"]
+            entry = {"run_id": run_id, "label": label, "timestamp": timestamp, "host": socket.gethostname(),
+                     "algorithm": algorithm, "support": result["support"], "status": result["status"],
+                     "dataset": os.path.basename(dataset), "dataset_hash": dataset_hash,
+                     "binary": binaries.get(algorithm), "binary_hash": binary_hashes.get(algorithm),
+                     "wall": as_list(result.get("times", result.get("wall"))),
+                     "user": as_list(result.get("user")), "sys": as_list(result.get("sys")),
+                     "max_rss_kb": result.get("max_rss_kb"), "timeout": result.get("timeout")}
+            f.write(json.dumps(entry) + "\n")
+    return run_id
+
+
+def load_entries(store_path):
+    """Read every entry of the store, skipping a torn last line from an interrupted write."""
+    entries = []
+    with open(store_path, 'r') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+def list_runs(entries):
+    """Summarize the runs in the store, oldest first."""
+    runs = {}
+    for entry in entries:
+        run = runs.setdefault(entry["run_id"], {"run_id": entry["run_id"], "label": entry["label"],
+                                                "timestamp": entry["timestamp"], "host": entry["host"],
+                                                "dataset": entry["dataset"], "dataset_hash": entry["dataset_hash"],
+                                                "points": 0})
+        run["points"] += 1
+    return sorted(runs.values(), key=lambda run: run["timestamp"])
+
+
+def resolve_run(runs, name, reference=None):
+    """Map 'latest', 'previous' or a run id/label to a run.
+
+    'previous' is the latest run before `reference` on the same dataset and
+    host, so an automatic comparison never mixes inputs or machines.
+    """
+    if name == "latest":
+        return runs[-1] if runs else None
+    if name == "previous":
+        earlier = [run for run in runs if run["timestamp"] < reference["timestamp"]
+                   and run["dataset_hash"] == reference["dataset_hash"] and run["host"] == reference["host"]]
+        return earlier[-1] if earlier else None
+    matches = [run for run in runs if name in (run["run_id"], run["label"])]
+    return matches[-1] if matches else None
+
+
+def permutation_pvalue(base, new, resamples=10000, seed=0):
+    """One-sided permutation test that `new` times are larger than `base` times.
+
+    Every relabelling is enumerated when there are at most `resamples` of
+    them, otherwise that many are drawn at random.
+    """
+    observed = statistics.mean(new) - statistics.mean(base)
+    pooled = base + new
+    total = sum(pooled)
+    n_new = len(new)
+    n_base = len(base)
+
+    def statistic(new_indices):
+        new_sum = sum(pooled[i] for i in new_indices)
+        return new_sum / n_new - (total - new_sum) / n_base
+
+    count = 0
+    combinations = 1
+    for i in range(n_new):
+        combinations = combinations * (len(pooled) - i) // (i + 1)
+    if combinations <= resamples:
+        for indices in itertools.combinations(range(len(pooled)), n_new):
+            count += statistic(indices) >= observed - 1e-12
+        return count / combinations
+
+    rng = random.Random(seed)
+    for _ in range(resamples):
+        count += statistic(rng.sample(range(len(pooled)), n_new)) >= observed - 1e-12
+    return (count + 1) / (resamples + 1)
+
+
+def compare_runs(entries, base_id, new_id, alpha=0.05, threshold=0.1):
+    """Compare every (algorithm, support) point of two runs.
+
+    A point regresses when its median wall time grew by more than
+    `threshold` (relative) and the permutation test gives p <= alpha, or
+    when it stopped finishing (ok -> timeout/failed/skipped). The p-value
+    is only computed for points that moved by more than the threshold, and
+    only when both runs have repeats; with 3 runs each the smallest exact
+    p-value is 1/20, so a complete separation is significant at 0.05.
+    """
+    base = {(e["algorithm"], e["support"]): e for e in entries if e["run_id"] == base_id}
+    new = {(e["algorithm"], e["support"]): e for e in entries if e["run_id"] == new_id}
+    rows = []
+    for key in sorted(set(base) & set(new)):
+        b, n = base[key], new[key]
+        row = {"algorithm": key[0], "support": key[1], "base_status": b["status"], "new_status": n["status"],
+               "base_median": None, "new_median": None, "ratio": None, "p_value": None, "verdict": "ok"}
+        if b["status"] == "ok" and n["status"] == "ok" and b["wall"] and n["wall"]:
+            row["base_median"] = statistics.median(b["wall"])
+            row["new_median"] = statistics.median(n["wall"])
+            row["ratio"] = row["new_median"] / row["base_median"] if row["base_median"] > 0 else None
+            repeated = len(b["wall"]) > 1 and len(n["wall"]) > 1
+            if row["ratio"] is not None and row["ratio"] > 1 + threshold:
+                if not repeated:
+                    row["verdict"] = "slower?"  # Too few repeats to tell noise from a regression
+                else:
+                    row["p_value"] = permutation_pvalue(b["wall"], n["wall"])
+                    row["verdict"] = "REGRESSION" if row["p_value"] <= alpha else "ok"
+            elif row["ratio"] is not None and row["ratio"] < 1 - threshold and repeated:
+                row["p_value"] = permutation_pvalue(n["wall"], b["wall"])
+                row["verdict"] = "faster" if row["p_value"] <= alpha else "ok"
+        elif b["status"] == "ok" and n["status"] != "ok":
+            row["verdict"] = "REGRESSION"
+        elif b["status"] != "ok" and n["status"] == "ok":
+            row["verdict"] = "faster"
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'algorithm':<10}{'support':>8}{'base (s)':>11}{'new (s)':>11}{'ratio':>8}{'p':>8}  verdict")
+    for row in rows:
+        base = f"{row['base_median']:.2f}" if row["base_median"] is not None else row["base_status"]
+        new = f"{row['new_median']:.2f}" if row["new_median"] is not None else row["new_status"]
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        p_value = f"{row['p_value']:.3f}" if row["p_value"] is not None else "-"
+        print(f"{row['algorithm']:<10}{row['support']:>8}{base:>11}{new:>11}{ratio:>8}{p_value:>8}  {row['verdict']}")
+
+
+def plot_comparison(entries, base_id, new_id, rows, plot_path):
+    """Runtime vs support for both runs, with regressed points circled in red and untested slowdowns in orange."""
+    import matplotlib.pyplot as plt  # Only plotting needs it; record and runs start without it
+
+    plt.figure(figsize=(10, 6))
+    for run_id, style in ((base_id, '--'), (new_id, '-')):
+        by_algorithm = {}
+        for entry in entries:
+            if entry["run_id"] == run_id and entry["status"] == "ok" and entry["wall"]:
+                by_algorithm.setdefault(entry["algorithm"], []).append(
+                    (entry["support"], statistics.median(entry["wall"])))
+        for algorithm, points in sorted(by_algorithm.items()):
+            support, wall = zip(*sorted(points))
+            plt.plot(support, wall, style, marker='o', label=f"{algorithm} ({run_id})")
+
+    regressed = [row for row in rows if row["verdict"] == "REGRESSION" and row["new_median"] is not None]
+    if regressed:
+        plt.scatter([row["support"] for row in regressed], [row["new_median"] for row in regressed], s=200,
+                    facecolors='none', edgecolors='red', linewidths=2, label="regression")
+    untested = [row for row in rows if row["verdict"] == "slower?"]
+    if untested:
+        plt.scatter([row["support"] for row in untested], [row["new_median"] for row in untested], s=200,
+                    facecolors='none', edgecolors='orange', linewidths=2, linestyles='--',
+                    label="slower, single run (not tested)")
+    plt.xlabel('Support')
+    plt.ylabel('Time (seconds)')
+    plt.title('Runtime vs Support: baseline (dashed) and new run (solid)')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(plot_path)
+    plt.close()
+    print(f"Comparison plot saved to {plot_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep benchmark results across runs and compare runs.")
+    parser.add_argument("--store", default=os.environ.get("BENCH_STORE", DEFAULT_STORE),
+                        help=f"JSONL results store (default: $BENCH_STORE or {DEFAULT_STORE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Append a runtime.json from bench_support.py or bench_miners.py")
+    record.add_argument("results_file")
+    record.add_argument("--dataset", required=True)
+    record.add_argument("--binary", nargs="+", default=[], metavar="ALGORITHM=PATH")
+    record.add_argument("--run-id", default=None)
+    record.add_argument("--label", default=None)
+
+    commands.add_parser("runs", help="List the recorded runs")
+
+    compare = commands.add_parser("compare", help="Flag regressions of one run against another; exits 1 if any")
+    compare.add_argument("base", help="Run id or label, or 'previous' (same dataset and host as the new run)")
+    compare.add_argument("new", nargs="?", default="latest", help="Run id or label (default: latest)")
+    compare.add_argument("--alpha", type=float, default=0.05, help="Significance level of the permutation test")
+    compare.add_argument("--threshold", type=float, default=0.1,
+                         help="Minimum relative slowdown of the median to count (default 0.1)")
+    compare.add_argument("--plot", default=None, help="Save a runtime-vs-support comparison plot here")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        with open(args.results_file, 'r') as f:
+            results = json.load(f)
+        binaries = dict(item.split("=", 1) for item in args.binary)
+        run_id = record_results(args.store, results, args.dataset, binaries, args.run_id, args.label)
+        print(f"Recorded {len(results)} results as run {run_id} in {args.store}")
+        sys.exit(0)
+
+    if not os.path.exists(args.store):
+        print(f"Error: Results store '{args.store}' does not exist.")
+        sys.exit(1)
+    entries = load_entries(args.store)
+    runs = list_runs(entries)
+
+    if args.command == "runs":
+        for run in runs:
+            recorded = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["timestamp"]))
+            print(f"{run['run_id']:<28}{run['label'] or '':<16}{recorded:<18}{run['host']:<20}"
+                  f"{run['dataset']} ({run['dataset_hash'][:8]}), {run['points']} points")
+        sys.exit(0)
+
+    new = resolve_run(runs, args.new)
+    if new is None:
+        print(f"Error: No run '{args.new}' in {args.store}.")
+        sys.exit(1)
+    base = resolve_run(runs, args.base, new)
+    if base is None:
+        print(f"No baseline run '{args.base}' to compare {new['run_id']} against.")
+        sys.exit(0)
+    if base["dataset_hash"] != new["dataset_hash"]:
+        print("Warning: the two runs used different datasets.")
+    binaries = {}
+    for entry in entries:
+        if entry["run_id"] in (base["run_id"], new["run_id"]):
+            binaries.setdefault(entry["algorithm"], {})[entry["run_id"]] = entry["binary_hash"]
+    for algorithm, hashes in sorted(binaries.items()):
+        if len(hashes) == 2 and hashes[base["run_id"]] != hashes[new["run_id"]]:
+            print(f"Note: the {algorithm} binary changed between the two runs.")
+
+    print(f"Comparing {new['run_id']} against {base['run_id']}")
+    rows = compare_runs(entries, base["run_id"], new["run_id"], args.alpha, args.threshold)
+    print_comparison(rows)
+    if args.plot:
+        plot_comparison(entries, base["run_id"], new["run_id"], rows, args.plot)
+    regressions = sum(row["verdict"] == "REGRESSION" for row in rows)
+    print(f"{regressions} regression(s) found.")
+    untested = sum(row["verdict"] == "slower?" for row in rows)
+    if untested:
+        print(f"Warning: {untested} point(s) slowed down but have a single run, so they could not be tested; "
+              f"rerun with more repeats.")
+    sys.exit(1 if regressions else 0)
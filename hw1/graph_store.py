@@ -0,0 +1,244 @@
+import json
+import os
+import sys
+from array import array
+
+import numpy as np
+
+STORE_FILES = ("node_labels.npy", "node_offsets.npy", "edge_endpoints.npy", "edge_weights.npy", "edge_offsets.npy")
+
+
+def read_transactions(path, fmt="fsg"):
+    """Stream the graphs of a text graph file as (name, labels, edges).
+
+    fmt is "fsg" for t/v/u (or e) transaction files such as pre_proc.txt and
+    FSG .fp output, "raw" for the q3 input format ('#' headers, v/e lines)
+    and "q2" for the q2 dataset format ('#id' headers, one label per line,
+    'u v w' edge lines). Node ids are renumbered by first appearance; edges
+    to undeclared nodes add a node with label -1. Every header yields a
+    graph, including empty ones.
+    """
+    name = None
+    started = False
+    labels = edges = position = None
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if fmt == "q2":
+                if line[0] == '#':
+                    kind = 't'
+                elif not line[0].isdigit():
+                    kind = 'label'
+                else:
+                    kind = 'edge'
+            else:
+                kind = line[0]
+                if fmt == "raw" and '#' in line:
+                    kind = 't'
+                elif fmt == "fsg" and line.startswith('#'):
+                    continue
+            if kind == 't':
+                if started:
+                    yield name, labels, edges
+                started = True
+                if fmt == "fsg":
+                    name = line[1:].strip().lstrip('#').strip()
+                elif fmt == "q2":
+                    name = line[1:]
+                else:
+                    name = line.replace('#', '', 1).strip()
+                labels, edges, position = [], [], {}
+            elif kind == 'label':
+                labels.append(line[0])
+            elif kind == 'v':
+                parts = line.split()
+                node, label = int(parts[1]), int(parts[2])
+                if node in position:
+                    labels[position[node]] = label
+                else:
+                    position[node] = len(labels)
+                    labels.append(label)
+            elif kind in ('u', 'e', 'edge'):
+                parts = line.split()
+                if kind != 'edge':
+                    parts = parts[1:]
+                if len(parts) != 3:
+                    continue
+                u, v, w = int(parts[0]), int(parts[1]), int(parts[2])
+                if kind != 'edge':
+                    for node in (u, v):
+                        if node not in position:
+                            position[node] = len(labels)
+                            labels.append(-1)
+                    u, v = position[u], position[v]
+                edges.append((u, v, w))
+    if started:
+        yield name, labels, edges
+
+
+def compile_store(graphs, out_dir):
+    """Write (name, labels, edges) graphs into a binary store directory.
+
+    Labels may be ints or strings; string labels are stored as their index
+    in the sorted label table (label_table.txt), as q2's converter numbers
+    them. Only flat arrays are accumulated, so memory stays proportional
+    to the number of nodes and edges. Returns the number of graphs.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    node_labels = array('q')
+    node_offsets = array('q', [0])
+    endpoints = array('q')
+    weights = array('q')
+    edge_offsets = array('q', [0])
+    string_ids = {}
+    with open(os.path.join(out_dir, "names.txt"), 'w') as names:
+        for name, labels, edges in graphs:
+            for label in labels:
+                if isinstance(label, str):
+                    label = string_ids.setdefault(label, len(string_ids))
+                node_labels.append(label)
+            for u, v, w in edges:
+                endpoints.append(u)
+                endpoints.append(v)
+                weights.append(w)
+            node_offsets.append(len(node_labels))
+            edge_offsets.append(len(weights))
+            names.write((name or "") + "\n")
+
+    labels = np.frombuffer(node_labels, dtype=np.int64).astype(np.int32)
+    if string_ids:
+        table = sorted(string_ids)
+        remap = np.empty(len(string_ids), dtype=np.int32)
+        for label, first_seen in string_ids.items():
+            remap[first_seen] = table.index(label)
+        labels = remap[labels]
+        with open(os.path.join(out_dir, "label_table.txt"), 'w') as f:
+            f.write("".join(label + "\n" for label in table))
+    np.save(os.path.join(out_dir, "node_labels.npy"), labels)
+    np.save(os.path.join(out_dir, "node_offsets.npy"), np.frombuffer(node_offsets, dtype=np.int64))
+    np.save(os.path.join(out_dir, "edge_endpoints.npy"),
+            np.frombuffer(endpoints, dtype=np.int64).astype(np.int32).reshape(-1, 2))
+    np.save(os.path.join(out_dir, "edge_weights.npy"), np.frombuffer(weights, dtype=np.int64).astype(np.int32))
+    np.save(os.path.join(out_dir, "edge_offsets.npy"), np.frombuffer(edge_offsets, dtype=np.int64))
+    num_graphs = len(node_offsets) - 1
+    with open(os.path.join(out_dir, "meta.json"), 'w') as f:
+        json.dump({"version": 1, "graphs": num_graphs, "nodes": len(node_labels), "edges": len(weights)}, f)
+    return num_graphs
+
+
+def is_store(path):
+    """Check whether path is a graph store directory."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+class GraphStore:
+    """Memory-mapped, random-access view of a compiled graph store.
+
+    store[i] returns factory(labels, endpoints, weights) for graph i, built
+    on zero-copy array slices (factory defaults to returning that tuple);
+    slicing returns a store over a range of graphs. A store pickles as its
+    path and range, so pool workers map the files themselves instead of
+    receiving the graphs.
+    """
+
+    def __init__(self, path, factory=None, start=0, stop=None):
+        self.path = path
+        self.factory = factory
+        self._open()
+        self.start = start
+        self.stop = len(self.node_offsets) - 1 if stop is None else stop
+
+    def _open(self):
+        arrays = [np.load(os.path.join(self.path, name), mmap_mode='r') for name in STORE_FILES]
+        self.node_labels, self.node_offsets, self.edge_endpoints, self.edge_weights, self.edge_offsets = arrays
+        self._names = None
+        self._label_table = None
+
+    def __getstate__(self):
+        return {"path": self.path, "factory": self.factory, "start": self.start, "stop": self.stop}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("GraphStore slices must be contiguous")
+            return GraphStore.__new__(GraphStore)._view(self, self.start + start, self.start + max(start, stop))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("graph index out of range")
+        labels, endpoints, weights = self.arrays(i)
+        return (labels, endpoints, weights) if self.factory is None else self.factory(labels, endpoints, weights)
+
+    def _view(self, store, start, stop):
+        self.__dict__.update(store.__dict__)
+        self.start, self.stop = start, stop
+        return self
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def arrays(self, i):
+        """Return the (labels, endpoints, weights) array views of graph i."""
+        g = self.start + i
+        nodes = slice(self.node_offsets[g], self.node_offsets[g + 1])
+        edges = slice(self.edge_offsets[g], self.edge_offsets[g + 1])
+        return self.node_labels[nodes], self.edge_endpoints[edges], self.edge_weights[edges]
+
+    def _all_names(self):
+        if self._names is None:
+            with open(os.path.join(self.path, "names.txt"), 'r') as f:
+                self._names = [line.rstrip("\n") for line in f]
+        return self._names
+
+    @property
+    def names(self):
+        """Graph names (header text after 't #') of the graphs in this range."""
+        return self._all_names()[self.start:self.stop]
+
+    def name(self, i):
+        """Name of graph i."""
+        return self._all_names()[self.start + i]
+
+    @property
+    def label_table(self):
+        """Label strings by label id for stores compiled from string labels, else None."""
+        if self._label_table is None:
+            table_path = os.path.join(self.path, "label_table.txt")
+            if os.path.exists(table_path):
+                with open(table_path, 'r') as f:
+                    self._label_table = [line.rstrip("\n") for line in f]
+        return self._label_table
+
+    def graph_lines(self, i, header="t # {name}", edge_tag="u"):
+        """Yield graph i as text lines: the header, 'v id label' and '<edge_tag> u v w'."""
+        labels, endpoints, weights = self.arrays(i)
+        yield header.format(name=self.name(i), index=i)
+        for node, label in enumerate(labels.tolist()):
+            yield f"v {node} {label}"
+        for (u, v), w in zip(endpoints.tolist(), weights.tolist()):
+            yield f"{edge_tag} {u} {v} {w}"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("fsg", "raw", "q2"):
+        print("Usage: python graph_store.py <fsg|raw|q2> <input_graph_file> <store_dir>")
+        sys.exit(1)
+
+    fmt, input_file, store_dir = sys.argv[1:]
+    if not os.path.exists(input_file):
+        print(f"Error: File '{input_file}' does not exist.")
+        sys.exit(1)
+
+    count = compile_store(read_transactions(input_file, fmt), store_dir)
+    print(f"Compiled {count} graphs from {input_file} into {store_dir}")
@@ -0,0 +1,354 @@
+import argparse
+import hashlib
+import os
+import struct
+import sys
+
+# dfs_code.py lives in q3/ and is shared with the pattern trie there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "q3"))
+from dfs_code import min_dfs_code
+
+MINERS = ("fsg", "gspan", "gaston")
+SECTION = struct.Struct("<4sIIQ")  # magic, name length, pattern count, code blob length
+ENTRY = struct.Struct("<16sII")  # digest, support, offset of the code in the blob
+MAGIC = b"PSET"
+
+
+def _label(value):
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+def parse_patterns(path, miner):
+    """Stream (support, labels, edges) for every pattern in a miner's output.
+
+    FSG writes 't # <id>, <support>' headers with 'u' edges, gSpan writes
+    't # <id> * <support>' with 'e' edges, and Gaston writes '# <support>'
+    before 't <id>' with 'e' edges. Comment and occurrence ('x') lines are
+    skipped.
+    """
+    support = None
+    labels = []
+    edges = []
+    started = False
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            tag = parts[0]
+            if tag == "t":
+                if started:
+                    yield support, labels, edges
+                labels, edges = [], []
+                started = True
+                if miner == "fsg":
+                    support = int(parts[-1])
+                elif miner == "gspan":
+                    if parts[2].startswith("-"):  # End-of-data marker
+                        started = False
+                        continue
+                    support = int(parts[-1])
+            elif tag == "#":
+                if miner == "gaston" and len(parts) == 2 and parts[1].isdigit():
+                    if started:
+                        yield support, labels, edges
+                        started = False
+                    support = int(parts[1])
+            elif tag == "v":
+                labels.append(_label(parts[2]))
+            elif tag in ("u", "e"):
+                edges.append((int(parts[1]), int(parts[2]), _label(parts[3])))
+    if started:
+        yield support, labels, edges
+
+
+def canonical_code(labels, edges):
+    """Minimum DFS code of a pattern as text; single-vertex patterns are 'v <label>'."""
+    code, _ = min_dfs_code(labels, edges)
+    if not code:
+        return f"v {labels[0]}"
+    return ";".join(" ".join(str(part) for part in edge) for edge in code)
+
+
+def code_digest(code):
+    return hashlib.blake2b(code.encode(), digest_size=16).digest()
+
+
+def code_lines(code, support=None):
+    """Render a canonical code back to gSpan-style 't/v/e' lines."""
+    header = "t #" if support is None else f"t # * {support}"
+    if code.startswith("v "):
+        return [header, f"v 0 {code[2:]}"]
+    vertices = {}
+    edges = []
+    for edge in code.split(";"):
+        i, j, label_i, edge_label, label_j = edge.split()
+        vertices.setdefault(int(i), label_i)
+        vertices.setdefault(int(j), label_j)
+        edges.append(f"e {i} {j} {edge_label}")
+    return [header] + [f"v {i} {label}" for i, label in sorted(vertices.items())] + edges
+
+
+class PatternSet:
+    """One ingested pattern dump: a digest -> (support, code offset) hash index plus the code blob."""
+
+    def __init__(self, name, index, store_path, blob_offset):
+        self.name = name
+        self.index = index
+        self._store_path = store_path
+        self._blob_offset = blob_offset
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, digest):
+        return digest in self.index
+
+    def keys(self):
+        return self.index.keys()
+
+    def support(self, digest):
+        return self.index[digest][0]
+
+    def codes(self, digests):
+        """Read the canonical codes of the given digests from the blob."""
+        with open(self._store_path, 'rb') as f:
+            result = {}
+            for digest in digests:
+                f.seek(self._blob_offset + self.index[digest][1])
+                result[digest] = f.readline().rstrip(b"\n").decode()
+        return result
+
+
+class PatternStore:
+    """Append-only binary file of named pattern sets.
+
+    Each set is written as a section header, a table of (digest, support,
+    code offset) entries sorted by digest and a newline-separated blob of
+    canonical codes. Opening the store only reads the entry tables, so set
+    operations are hash lookups on 16-byte digests; codes are read on demand
+    for reports. A set ingested again under the same name replaces the
+    earlier one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sections = {}  # name -> (entry table offset, count, blob length)
+        if os.path.exists(path):
+            self._scan()
+
+    def _scan(self):
+        with open(self.path, 'rb') as f:
+            while True:
+                header = f.read(SECTION.size)
+                if len(header) < SECTION.size:
+                    break
+                magic, name_length, count, blob_length = SECTION.unpack(header)
+                if magic != MAGIC:
+                    print(f"Error: '{self.path}' is not a pattern store.")
+                    sys.exit(1)
+                name = f.read(name_length).decode()
+                start = f.tell()
+                end = start + count * ENTRY.size + blob_length
+                if end > os.path.getsize(self.path):
+                    break  # Torn last section from an interrupted ingest
+                self.sections[name] = (start, count, blob_length)
+                f.seek(end)
+
+    def names(self):
+        return list(self.sections)
+
+    def add(self, name, patterns):
+        """Append a set built from (support, code) pairs; returns (stored, duplicates)."""
+        entries = {}
+        duplicates = 0
+        for support, code in patterns:
+            digest = code_digest(code)
+            if digest in entries:
+                duplicates += 1
+                continue
+            entries[digest] = (support, code)
+
+        blob = bytearray()
+        table = bytearray()
+        for digest in sorted(entries):
+            support, code = entries[digest]
+            table += ENTRY.pack(digest, support or 0, len(blob))
+            blob += code.encode() + b"\n"
+        encoded = name.encode()
+        with open(self.path, 'ab') as f:
+            f.write(SECTION.pack(MAGIC, len(encoded), len(entries), len(blob)))
+            f.write(encoded)
+            start = f.tell()
+            f.write(table)
+            f.write(blob)
+        self.sections[name] = (start, len(entries), len(blob))
+        return len(entries), duplicates
+
+    def load(self, name):
+        if name not in self.sections:
+            print(f"Error: No pattern set '{name}' in {self.path}. Known sets: {', '.join(self.names())}")
+            sys.exit(1)
+        start, count, _ = self.sections[name]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            table = f.read(count * ENTRY.size)
+        index = {digest: (support, offset) for digest, support, offset in ENTRY.iter_unpack(table)}
+        return PatternSet(name, index, self.path, start + count * ENTRY.size)
+
+
+def ingest(store, path, miner=None, name=None):
+    """Canonicalize every pattern of a miner output file into the store."""
+    name = name or os.path.basename(path)
+    miner = miner or name.split("_")[0]
+    if miner not in MINERS:
+        print(f"Error: Cannot tell the miner of '{path}'; pass --miner ({', '.join(MINERS)}).")
+        sys.exit(1)
+    patterns = ((support, canonical_code(labels, edges)) for support, labels, edges in parse_patterns(path, miner))
+    stored, duplicates = store.add(name, patterns)
+    print(f"Ingested {stored} patterns from {path} as '{name}'" +
+          (f" ({duplicates} duplicates dropped)" if duplicates else ""))
+    return stored
+
+
+def difference(a, b):
+    return [digest for digest in a.keys() if digest not in b]
+
+
+def intersection(a, b):
+    return [digest for digest in a.keys() if digest in b]
+
+
+def print_patterns(pattern_set, digests, limit):
+    codes = pattern_set.codes(sorted(digests)[:limit])
+    for digest, code in codes.items():
+        print("\n".join(code_lines(code, pattern_set.support(digest))))
+    if len(digests) > limit:
+        print(f"... {len(digests) - limit} more")
+
+
+def crosscheck(sets, limit, output_dir=None):
+    """Report per-set counts and the patterns each set misses relative to the others.
+
+    Patterns found by every set but with different supports are listed as
+    well. With output_dir, every mismatch list is written there in full.
+    """
+    union = set()
+    for pattern_set in sets:
+        union.update(pattern_set.keys())
+    print(f"{'set':<20}{'patterns':>10}{'missing':>10}{'extra':>8}")
+    missing = {}
+    for pattern_set in sets:
+        missing[pattern_set.name] = [digest for digest in union if digest not in pattern_set]
+        extra = sum(1 for digest in pattern_set.keys() if not all(digest in other for other in sets))
+        print(f"{pattern_set.name:<20}{len(pattern_set):>10}{len(missing[pattern_set.name]):>10}{extra:>8}")
+
+    common = [digest for digest in union if all(digest in pattern_set for pattern_set in sets)]
+    support_mismatches = [digest for digest in common
+                          if len({pattern_set.support(digest) for pattern_set in sets}) > 1]
+    print(f"{len(union)} distinct patterns, {len(common)} found by every set, "
+          f"{len(support_mismatches)} with differing supports")
+
+    def render(digests):
+        # Each pattern is read from the first set that has it
+        lines = []
+        for owner in sets:
+            found = [digest for digest in digests if digest in owner]
+            for digest, code in owner.codes(found).items():
+                lines.extend(code_lines(code, owner.support(digest)))
+            digests = [digest for digest in digests if digest not in owner]
+        return lines
+
+    for pattern_set in sets:
+        digests = sorted(missing[pattern_set.name])
+        if not digests:
+            continue
+        print(f"\nMissing from {pattern_set.name}:")
+        print("\n".join(render(digests[:limit])))
+        if len(digests) > limit:
+            print(f"... {len(digests) - limit} more")
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            with open(os.path.join(output_dir, f"missing_{pattern_set.name}.txt"), 'w') as f:
+                f.write("\n".join(render(digests)) + "\n")
+
+    if support_mismatches:
+        print("\nDiffering supports:")
+        shown = sorted(support_mismatches)[:limit]
+        for digest, code in sets[0].codes(shown).items():
+            supports = ", ".join(f"{pattern_set.name}={pattern_set.support(digest)}" for pattern_set in sets)
+            print(f"{code}: {supports}")
+        if len(support_mismatches) > limit:
+            print(f"... {len(support_mismatches) - limit} more")
+    return missing, support_mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store mined patterns by minimum DFS code and compare pattern sets.")
+    parser.add_argument("store", help="Pattern store file (created on first ingest)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="Add FSG/gSpan/Gaston output files as named sets")
+    ingest_parser.add_argument("files", nargs="+")
+    ingest_parser.add_argument("--miner", choices=MINERS, default=None,
+                               help="Output format (default: the file name prefix, e.g. fsg_10)")
+    ingest_parser.add_argument("--name", default=None, help="Set name for a single file (default: the file name)")
+
+    commands.add_parser("list", help="List the stored sets")
+
+    for command, description in (("diff", "Patterns in A but not in B, e.g. fsg_10 fsg_25"),
+                                 ("intersect", "Patterns in both A and B")):
+        set_parser = commands.add_parser(command, help=description)
+        set_parser.add_argument("a")
+        set_parser.add_argument("b")
+        set_parser.add_argument("--show", type=int, default=10, help="Print at most this many patterns")
+
+    check_parser = commands.add_parser("crosscheck", help="Compare sets that should agree, e.g. one support level")
+    check_parser.add_argument("sets", nargs="*", help="Set names (default: every set)")
+    check_parser.add_argument("--support", type=int, default=None,
+                              help="Compare the <miner>_<support> sets of every miner")
+    check_parser.add_argument("--show", type=int, default=10, help="Print at most this many patterns per list")
+    check_parser.add_argument("--output-dir", default=None, help="Write the full mismatch lists here")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        if args.name and len(args.files) > 1:
+            parser.error("--name needs a single file")
+        for path in args.files:
+            if not os.path.exists(path):
+                print(f"Error: File '{path}' does not exist.")
+                sys.exit(1)
+        store = PatternStore(args.store)
+        for path in args.files:
+            ingest(store, path, args.miner, args.name)
+        sys.exit(0)
+
+    if not os.path.exists(args.store):
+        print(f"Error: Pattern store '{args.store}' does not exist.")
+        sys.exit(1)
+    store = PatternStore(args.store)
+
+    if args.command == "list":
+        for name, (_, count, _) in store.sections.items():
+            print(f"{name:<20}{count:>10} patterns")
+    elif args.command in ("diff", "intersect"):
+        a, b = store.load(args.a), store.load(args.b)
+        if args.command == "diff":
+            digests = difference(a, b)
+            print(f"{len(digests)} of {len(a)} patterns in {a.name} are not in {b.name}")
+        else:
+            digests = intersection(a, b)
+            print(f"{len(digests)} patterns in both {a.name} ({len(a)}) and {b.name} ({len(b)})")
+        print_patterns(a, digests, args.show)
+    else:
+        names = args.sets or store.names()
+        if args.support is not None:
+            expected = [f"{miner}_{args.support}" for miner in MINERS]
+            names = [name for name in expected if name in store.sections]
+            if not names:
+                print(f"Error: No sets for support {args.support} in the store (expected {', '.join(expected)}).")
+                sys.exit(1)
+        if len(names) < 2:
+            print("Error: Need at least two sets to crosscheck.")
+            sys.exit(1)
+        crosscheck([store.load(name) for name in names], args.show, args.output_dir)
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+OUTPUT_PREFIX = {"apriori": "ap", "fpgrowth": "fp"}
+
+
+def count_itemsets(path, chunk_size=1 << 20):
+    """Count the itemsets in an apriori/fpgrowth output file (one per line) without loading it."""
+    count = 0
+    last = b"\n"
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    return count + (last != b"\n")  # Last line without a trailing newline
+
+
+def run_once(algo_path, support, dataset_path, output_file, timeout):
+    """Run one mining job; return (wall time, exit code, rusage), with a None time if it timed out.
+
+    The child is reaped with os.wait4 so its CPU times and peak RSS come back with it.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([algo_path, f"-s{support}", dataset_path, output_file], stdout=subprocess.DEVNULL)
+    while True:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.perf_counter() - start > timeout:
+            process.send_signal(signal.SIGKILL)
+            os.wait4(process.pid, 0)
+            process.returncode = -signal.SIGKILL  # Reaped here, not by Popen
+            return None, None, None
+        time.sleep(0.01)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return time.perf_counter() - start, process.returncode, rusage
+
+
+def sweep(algorithms, supports, dataset_path, output_folder, repeats, timeout, results_file):
+    """Run every algorithm over the supports from high to low, `repeats` times per point.
+
+    Runtime only grows as support falls, so once an algorithm times out at
+    some support its lower supports are recorded as skipped instead of
+    being run. Results are written to results_file after every point.
+    """
+    results = []
+    timed_out = set()
+    for support in sorted(supports, reverse=True):
+        for algo_path in algorithms:
+            algo = os.path.basename(algo_path)
+            output_file = os.path.join(output_folder, f"{OUTPUT_PREFIX[algo]}{support}")
+            result = {"algorithm": algo, "support": support, "status": "ok", "timeout": timeout,
+                      "times": [], "user": [], "sys": [], "max_rss_kb": 0}
+
+            if algo in timed_out:
+                result["status"] = "skipped"
+            else:
+                for _ in range(repeats):
+                    elapsed, exit_code, rusage = run_once(algo_path, support, dataset_path, output_file, timeout)
+                    if elapsed is None:
+                        result["status"] = "timeout"
+                        timed_out.add(algo)
+                        break
+                    if exit_code != 0:
+                        result["status"] = "failed"
+                        break
+                    result["times"].append(elapsed)
+                    result["user"].append(rusage.ru_utime)
+                    result["sys"].append(rusage.ru_stime)
+                    result["max_rss_kb"] = max(result["max_rss_kb"], rusage.ru_maxrss)
+
+            if result["status"] == "ok" and os.path.exists(output_file):
+                times = result["times"]
+                result["median"] = statistics.median(times)
+                result["min"] = min(times)
+                result["max"] = max(times)
+                result["stdev"] = statistics.stdev(times) if len(times) > 1 else 0.0
+                result["itemsets"] = count_itemsets(output_file)
+                result["itemsets_per_sec"] = result["itemsets"] / result["median"] if result["median"] > 0 else None
+                print(f"{algo} support={support}: median {result['median']:.2f}s "
+                      f"(min {result['min']:.2f}s, max {result['max']:.2f}s over {len(times)} runs), "
+                      f"{result['itemsets']} itemsets")
+            else:
+                if result["status"] == "ok":
+                    result["status"] = "failed"
+                # Ensure an empty output file exists for every point, as before
+                open(output_file, 'a').close()
+                print(f"{algo} support={support}: {result['status']}")
+
+            results.append(result)
+            with open(results_file, 'w') as f:
+                json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark apriori and fpgrowth over support values.")
+    parser.add_argument("apriori")
+    parser.add_argument("fpgrowth")
+    parser.add_argument("dataset")
+    parser.add_argument("output_folder", nargs="?", default="out")
+    parser.add_argument("--supports", type=int, nargs="+", default=[5, 10, 25, 50, 90])
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Runs per (algorithm, support); the median is reported and bench_store.py needs at "
+                             "least 2 to test a slowdown (default 3)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Wall-clock limit per run in seconds")
+    args = parser.parse_args()
+
+    for path in (args.apriori, args.fpgrowth):
+        if os.path.basename(path) not in OUTPUT_PREFIX:
+            print(f"Unknown algorithm: {os.path.basename(path)}")
+            sys.exit(1)
+    if not os.path.exists(args.dataset):
+        print(f"Error: File '{args.dataset}' does not exist.")
+        sys.exit(1)
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    results_file = os.path.join(args.output_folder, "runtime.json")
+    sweep([args.apriori, args.fpgrowth], args.supports, args.dataset, args.output_folder,
+          max(1, args.repeats), args.timeout, results_file)
+    print(f"Results saved to {results_file}")
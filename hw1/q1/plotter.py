@@ -1,31 +1,50 @@
 import matplotlib.pyplot as plt
+import json
 import sys
 import os
 
-def main(output_folder, runtime_data):
-    # Dictionary to store runtime data
-    algo_data = {}
+def load_results(results_file):
+    # Results written by bench_support.py: one record per (algorithm, support)
+    with open(results_file, 'r') as f:
+        return json.load(f)
 
+def parse_runtime_data(runtime_data):
+    # Legacy "algo,support,time" strings, as q1.sh used to pass them
+    results = []
     for entry in runtime_data:
         algo, support, time = entry.split(",")
-        support = int(support)
-        time = float(time)
-
-        if algo not in algo_data:
-            algo_data[algo] = {"support": [], "time": []}
+        results.append({"algorithm": algo, "support": int(support), "status": "ok",
+                        "median": float(time), "min": float(time), "max": float(time)})
+    return results
 
-        algo_data[algo]["support"].append(support)
-        algo_data[algo]["time"].append(time)
+def main(output_folder, results):
+    # Dictionary to store runtime data
+    algo_data = {}
 
-    # Sort support values for correct plotting
-    for algo in algo_data:
-        sorted_pairs = sorted(zip(algo_data[algo]["support"], algo_data[algo]["time"]))
-        algo_data[algo]["support"], algo_data[algo]["time"] = zip(*sorted_pairs)
+    for result in results:
+        algo = result["algorithm"]
+        if algo not in algo_data:
+            algo_data[algo] = {"ok": [], "timeout": []}
+        if result["status"] == "ok":
+            algo_data[algo]["ok"].append((result["support"], result["median"], result["min"], result["max"]))
+        elif result["status"] in ("timeout", "skipped"):
+            # Timed-out and skipped points took at least the timeout
+            algo_data[algo]["timeout"].append((result["support"], result["timeout"]))
 
     # Create plot
     plt.figure(figsize=(10, 6))
     for algo, data in algo_data.items():
-        plt.plot(data["support"], data["time"], marker='o', label=algo)
+        points = sorted(data["ok"])
+        if points:
+            support, median, low, high = zip(*points)
+            errors = [[m - l for m, l in zip(median, low)], [h - m for m, h in zip(median, high)]]
+            line = plt.errorbar(support, median, yerr=errors, marker='o', capsize=3, label=algo)
+            color = line[0].get_color()
+        else:
+            color = None
+        if data["timeout"]:
+            support, limit = zip(*sorted(data["timeout"]))
+            plt.scatter(support, limit, marker='x', color=color, label=f"{algo} (timeout)")
 
     plt.xlabel('Support')
     plt.ylabel('Time (seconds)')
@@ -43,15 +62,19 @@ def main(output_folder, runtime_data):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python3 plotly.py <output_folder> <runtime_data>")
+        print("Usage: python3 plotter.py <output_folder> <runtime.json | runtime_data...>")
         sys.exit(1)
 
     output_folder = sys.argv[1]
-    runtime_data = sys.argv[2:]  # Remaining arguments are runtime data
+    runtime_data = sys.argv[2:]  # Remaining arguments are a results file or runtime data
 
     if not runtime_data:
         print("Error: No runtime data provided.")
         sys.exit(1)
 
-    main(output_folder, runtime_data)
+    if len(runtime_data) == 1 and runtime_data[0].endswith(".json"):
+        results = load_results(runtime_data[0])
+    else:
+        results = parse_runtime_data(runtime_data)
+    main(output_folder, results)
 
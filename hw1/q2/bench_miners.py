@@ -0,0 +1,215 @@
+import argparse
+import functools
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+# Only the standard library is imported here: on Linux a child's peak RSS
+# starts at the RSS of the process that forked it, so the launcher stays small.
+
+ALGORITHMS = ("fsg", "gspan", "gaston")
+
+
+def make_jobs(algorithms, supports, paths, output_dir, graph_count, repeats=1):
+    """Build `repeats` jobs per (algorithm, support).
+
+    Every job runs in its own directory holding symlinks to the converted
+    datasets, because FSG and gSpan write their output next to their input
+    and parallel jobs would otherwise overwrite each other's files. The
+    repeats are interleaved (every point once, then again), so a slow
+    period of the machine does not hit all runs of one point.
+    """
+    jobs = []
+    for repeat in range(repeats):
+        for support in supports:
+            for algorithm in algorithms:
+                jobs.append(make_job(algorithm, support, repeat, paths, output_dir, graph_count))
+    return jobs
+
+
+def make_job(algorithm, support, repeat, paths, output_dir, graph_count):
+    job_dir = os.path.join(output_dir, "jobs", f"{algorithm}_{support}", str(repeat))
+    os.makedirs(job_dir, exist_ok=True)
+    for name in ("fsg_dataset.txt", "gspan_gaston_dataset.txt"):
+        link = os.path.join(job_dir, name)
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.abspath(os.path.join(output_dir, name)), link)
+
+    job = {"algorithm": algorithm, "support": support, "repeat": repeat, "cwd": job_dir, "stdout": None,
+           "target": os.path.join(output_dir, f"{algorithm}_{support}")}
+    if algorithm == "fsg":
+        job["command"] = [paths["fsg"], "-s", str(support), "fsg_dataset.txt"]
+        job["produced"] = os.path.join(job_dir, "fsg_dataset.fp")
+    elif algorithm == "gspan":
+        job["command"] = [paths["gspan"], "-f", "gspan_gaston_dataset.txt", "-s", f"{support / 100:g}", "-o"]
+        job["produced"] = os.path.join(job_dir, "gspan_gaston_dataset.txt.fp")
+    else:
+        # Gaston takes its support as an absolute number of graphs and prints the patterns
+        job["command"] = [paths["gaston"], f"{support * graph_count / 100:g}", "gspan_gaston_dataset.txt"]
+        job["stdout"] = job["produced"] = os.path.join(job_dir, "gaston_patterns.txt")
+    return job
+
+
+def launcher_rss_kb():
+    """Current RSS of this process in KB, the floor of every job's reported peak RSS."""
+    with open("/proc/self/statm", 'r') as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def finish(job, core, start, status, rusage, timed_out):
+    """Turn a reaped job into a result record and move its output into place."""
+    exit_code = os.waitstatus_to_exitcode(status)
+    if timed_out:
+        state = "timeout"
+    elif job["stdout"] is not None:  # Gaston's output file always exists, so its exit code decides
+        state = "ok" if exit_code == 0 else "failed"
+    else:
+        state = "ok" if os.path.exists(job["produced"]) else "failed"
+
+    if state == "ok":
+        shutil.move(job["produced"], job["target"])  # Every repeat finds the same patterns
+    elif not os.path.exists(job["target"]):
+        open(job["target"], 'w').close()  # Empty pattern file, as q2.sh leaves one
+
+    return {"algorithm": job["algorithm"], "support": job["support"], "repeat": job["repeat"], "status": state,
+            "exit_code": exit_code,
+            "wall": time.monotonic() - start, "user": rusage.ru_utime, "sys": rusage.ru_stime,
+            "max_rss_kb": rusage.ru_maxrss, "core": core, "command": job["command"],
+            "log": os.path.join(job["cwd"], "job.log")}
+
+
+def aggregate(runs, timeout):
+    """Merge the runs of every (algorithm, support) into one record, as bench_support.py writes them.
+
+    A point is "timeout" or "failed" if any of its runs was; "times",
+    "user" and "sys" list the runs in order and "wall" is their median.
+    """
+    points = {}
+    for run in sorted(runs, key=lambda r: (r["support"], r["algorithm"], r["repeat"])):
+        points.setdefault((run["support"], run["algorithm"]), []).append(run)
+    records = []
+    for (support, algorithm), point_runs in points.items():
+        statuses = {run["status"] for run in point_runs}
+        status = "timeout" if "timeout" in statuses else "failed" if "failed" in statuses else "ok"
+        times = [run["wall"] for run in point_runs]
+        records.append({"algorithm": algorithm, "support": support, "status": status, "timeout": timeout,
+                        "times": times, "wall": statistics.median(times),
+                        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+                        "user": [run["user"] for run in point_runs], "sys": [run["sys"] for run in point_runs],
+                        "max_rss_kb": max(run["max_rss_kb"] for run in point_runs),
+                        "launcher_rss_kb": point_runs[0]["launcher_rss_kb"], "runs": point_runs})
+    return records
+
+
+def run_jobs(jobs, cores, timeout, results_file):
+    """Run the jobs with at most one per core, each pinned to its core.
+
+    Children are reaped with os.wait4, which gives their CPU times and peak
+    RSS; a job past its timeout has its process group killed and the
+    repeats of its point that have not started yet are dropped, as they
+    would time out as well. The results, merged per (algorithm, support)
+    by aggregate, are written to
+    results_file after every job, so an interrupted sweep keeps what it
+    finished. Returns the individual runs.
+    """
+    floor = launcher_rss_kb()
+    queue = list(jobs)
+    free = list(cores)
+    running = {}  # pid -> (job, core, start, process, timed out)
+    results = []
+    while queue or running:
+        while queue and free:
+            job = queue.pop(0)
+            core = free.pop(0)
+            log = open(os.path.join(job["cwd"], "job.log"), 'w')
+            stdout = open(job["stdout"], 'w') if job["stdout"] else log
+            start = time.monotonic()
+            try:
+                process = subprocess.Popen(job["command"], cwd=job["cwd"], stdout=stdout, stderr=log,
+                                           start_new_session=True,
+                                           preexec_fn=functools.partial(os.sched_setaffinity, 0, {core}))
+            except OSError as error:
+                print(f"Error: could not start {job['algorithm']} at support={job['support']}: {error}")
+                results.append({"algorithm": job["algorithm"], "support": job["support"], "repeat": job["repeat"],
+                                "status": "failed", "exit_code": None, "wall": 0.0, "user": 0.0, "sys": 0.0,
+                                "max_rss_kb": 0, "launcher_rss_kb": floor, "core": core, "command": job["command"], "log": None})
+                free.append(core)
+                continue
+            finally:
+                log.close()
+                if stdout is not log:
+                    stdout.close()
+            running[process.pid] = (job, core, start, process, False)
+            print(f"Started {job['algorithm']} support={job['support']} (run {job['repeat'] + 1}) on core {core}")
+
+        time.sleep(0.05)
+        for pid, (job, core, start, process, timed_out) in list(running.items()):
+            reaped, status, rusage = os.wait4(pid, os.WNOHANG)
+            if reaped == 0:
+                if not timed_out and time.monotonic() - start > timeout:
+                    os.killpg(pid, signal.SIGKILL)
+                    running[pid] = (job, core, start, process, True)
+                continue
+            process.returncode = os.waitstatus_to_exitcode(status)  # Reaped here, not by Popen
+            result = finish(job, core, start, status, rusage, timed_out)
+            result["launcher_rss_kb"] = floor
+            results.append(result)
+            del running[pid]
+            free.append(core)
+            print(f"{result['algorithm']} support={result['support']}: {result['status']} in {result['wall']:.2f}s "
+                  f"(user {result['user']:.2f}s, sys {result['sys']:.2f}s, peak RSS {result['max_rss_kb']} KB)")
+            if result["status"] == "timeout":
+                point = (job["algorithm"], job["support"])
+                remaining = [queued for queued in queue if (queued["algorithm"], queued["support"]) != point]
+                if len(remaining) < len(queue):
+                    print(f"Skipping the other {len(queue) - len(remaining)} runs of {job['algorithm']} "
+                          f"support={job['support']} after its timeout")
+                queue = remaining
+
+            with open(results_file, 'w') as f:
+                json.dump(aggregate(results, timeout), f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FSG, gSpan and Gaston over support values in parallel.")
+    parser.add_argument("gspan")
+    parser.add_argument("fsg")
+    parser.add_argument("gaston")
+    parser.add_argument("dataset")
+    parser.add_argument("output_dir")
+    parser.add_argument("--supports", type=int, nargs="+", default=[5, 10, 25, 50, 95])
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--cores", type=int, default=1, help="Number of jobs run at once, one core each (default 1)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Wall-clock limit per job in seconds")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Runs per (algorithm, support), enough for bench_store.py to test a slowdown (default 3)")
+    args = parser.parse_args()
+
+    available = sorted(os.sched_getaffinity(0))
+    if args.cores > len(available):
+        print(f"Warning: only {len(available)} cores available, using {len(available)} instead of {args.cores}.")
+    cores = available[:max(1, args.cores)]
+
+    # The converter runs in its own process to keep its imports out of the launcher
+    os.makedirs(args.output_dir, exist_ok=True)
+    process_data = os.path.join(os.path.dirname(os.path.abspath(__file__)), "process_data.py")
+    subprocess.run([sys.executable, process_data, args.dataset, args.output_dir], check=True)
+    with open(os.path.join(args.output_dir, "graph_count.txt"), 'r') as f:
+        graph_count = int(f.read())
+
+    # Jobs run in their own directories, so relative miner paths are made absolute
+    paths = {name: os.path.abspath(path) if os.sep in path else shutil.which(path) or path
+             for name, path in (("fsg", args.fsg), ("gspan", args.gspan), ("gaston", args.gaston))}
+    jobs = make_jobs(args.algorithms, args.supports, paths, args.output_dir, graph_count, max(1, args.repeats))
+    results_file = os.path.join(args.output_dir, "runtime.json")
+    results = aggregate(run_jobs(jobs, cores, args.timeout, results_file), args.timeout)
+
+    failed = [r for r in results if r["status"] != "ok"]
+    print(f"✅ {len(results) - len(failed)} of {len(results)} points finished; results saved at {results_file}")
@@ -1,98 +1,123 @@
+import json
 import os
 import sys
 import matplotlib.pyplot as plt
 
-def convert_fsg_format(input_file, output_file):
-    """Convert dataset format for FSG."""
-    freq = set()
+# graph_store.py lives in hw1/ and is shared with q3
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from graph_store import GraphStore, is_store
 
+def scan_labels(input_file):
+    """Collect the node labels of the dataset; returns {label: index} in sorted order."""
+    labels = set()
     with open(input_file, 'r') as f:
-        lines = f.read().strip().split('\n')
-
-    output = []
-    count_alph = 0
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        if not line[0].isdigit() and line[0] != '#':  # Node label
-            freq.add(line[0])
-
-    NODE_ORDER = sorted(freq)
-    NODE_MAPPING = {label: index for index, label in enumerate(NODE_ORDER)}
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        elif line.startswith("#"):
-            output.append(f"t # {line[1:]}")
-            count_alph = 0
-        elif not line[0].isdigit():  # Node label
-            if line[0] in NODE_MAPPING:
-                output.append(f"v {count_alph} {NODE_MAPPING[line[0]]}")
+        for line in f:
+            line = line.strip()
+            if line and not line[0].isdigit() and line[0] != '#':  # Node label
+                labels.add(line[0])
+    return {label: index for index, label in enumerate(sorted(labels))}
+
+def fsg_lines(input_file, node_mapping):
+    """Stream the dataset as FSG lines."""
+    with open(input_file, 'r') as f:
+        count_alph = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            elif line.startswith("#"):
+                yield f"t # {line[1:]}"
+                count_alph = 0
+            elif not line[0].isdigit():  # Node label
+                yield f"v {count_alph} {node_mapping[line[0]]}"
                 count_alph += 1
-        else:  # Edge
-            parts = line.split()
-            if len(parts) == 3:
-                output.append(f"u {parts[0]} {parts[1]} {parts[2]}")
-
-    with open(output_file, 'w') as f:
-        f.write('\n'.join(output))
-
-def convert_gspan_gaston_format(input_file, output_file):
-    """Convert dataset format for GSpan and Gaston."""
-    with open(input_file, 'r') as file:
-        lines = file.read().strip().split('\n')
+            else:  # Edge
+                parts = line.split()
+                if len(parts) == 3:
+                    yield f"u {parts[0]} {parts[1]} {parts[2]}"
+
+def convert_dataset(input_file, fsg_file, gspan_gaston_file):
+    """Convert the dataset (or a graph store compiled with 'q2') for FSG and GSpan/Gaston in one pass.
+
+    Both files are written while streaming the input; only the label table
+    needs a pre-scan (a store already has it). Returns (graph count, label
+    table {label: index}).
+    """
+    if is_store(input_file):
+        store = GraphStore(input_file)
+        node_mapping = {label: index for index, label in enumerate(store.label_table or [])}
+        lines = (line for i in range(len(store)) for line in store.graph_lines(i))
+    else:
+        node_mapping = scan_labels(input_file)
+        lines = fsg_lines(input_file, node_mapping)
 
-    output = []
     hash_count = 0
-
-    for line in lines:
-        line = line.split()
-        if line[0] == "t":
-            output.append(f"t # {line[2]}")
-            hash_count += 1
-        elif line[0] == "v":
-            output.append(f"v {line[1]} {line[2]}")
-        else:
-            output.append(f"e {line[1]} {line[2]} {line[3]}")
-
-    with open(output_file, 'w') as f:
-        f.write('\n'.join(output))
-
-    return hash_count
+    with open(fsg_file, 'w') as fsg, open(gspan_gaston_file, 'w') as gspan:
+        separator = ""
+        for line in lines:
+            parts = line.split()
+            if parts[0] == "t":
+                gspan_line = f"t # {parts[2]}"
+                hash_count += 1
+            elif parts[0] == "v":
+                gspan_line = line
+            else:
+                gspan_line = f"e {parts[1]} {parts[2]} {parts[3]}"
+            fsg.write(separator + line)
+            gspan.write(separator + gspan_line)
+            separator = "\n"
+
+    return hash_count, node_mapping
+
+def read_runtime_results(runtime_file):
+    """Read benchmark results as records with algorithm, support, status and wall time.
+
+    runtime.json (written by bench_miners.py) holds structured records; the
+    older runtime.txt lines 'support,algorithm,time' become 'ok' records and
+    'FAILED' times 'failed' ones.
+    """
+    if runtime_file.endswith('.json'):
+        with open(runtime_file, 'r') as file:
+            return json.load(file)
+
+    results = []
+    with open(runtime_file, 'r') as file:
+        for line in file:
+            parts = line.strip().split(',')
+            if len(parts) != 3:
+                continue
+            support, algo, time = parts
+            try:
+                results.append({"algorithm": algo, "support": int(support), "status": "ok", "wall": float(time)})
+            except ValueError:
+                results.append({"algorithm": algo, "support": int(support), "status": "failed", "wall": None})
+    return results
 
 def plot_runtime(runtime_file, output_folder):
-    """Plot runtime results from runtime.txt."""
+    """Plot runtime results from runtime.json or runtime.txt.
+
+    Timed-out runs are drawn with an 'x' at their wall time; failed runs
+    are left out.
+    """
     if not os.path.exists(runtime_file):
         print(f"Error: {runtime_file} not found!")
         return
 
     algorithms = {}
-
-    with open(runtime_file, 'r') as file:
-        lines = file.readlines()
-
-    for line in lines:
-        parts = line.strip().split(',')
-        if len(parts) != 3:
+    for result in sorted(read_runtime_results(runtime_file), key=lambda r: r["support"]):
+        if result["status"] == "failed":
             continue
-
-        support, algo, time = parts
-        support = int(support)
-        time = float(time)
-
-        if algo not in algorithms:
-            algorithms[algo] = {'support': [], 'time': []}
-
-        algorithms[algo]['support'].append(support)
-        algorithms[algo]['time'].append(time)
+        data = algorithms.setdefault(result["algorithm"], {'support': [], 'time': [], 'timeout': []})
+        data['support'].append(result["support"])
+        data['time'].append(result["wall"])
+        data['timeout'].append(result["status"] == "timeout")
 
     plt.figure(figsize=(10, 6))
     for algo, data in algorithms.items():
-        plt.plot(data['support'], data['time'], label=algo, marker='o')
+        line, = plt.plot(data['support'], data['time'], label=algo, marker='o')
+        timeouts = [(s, t) for s, t, hit in zip(data['support'], data['time'], data['timeout']) if hit]
+        if timeouts:
+            plt.scatter(*zip(*timeouts), marker='x', s=80, color=line.get_color())
 
     plt.xlabel('Support Value')
     plt.ylabel('Time (seconds)')
@@ -112,13 +137,14 @@ if __name__ == "__main__":
         fsg_dataset = os.path.join(output_folder, "fsg_dataset.txt")
         gspan_gaston_dataset = os.path.join(output_folder, "gspan_gaston_dataset.txt")
 
-        print("Converting dataset for FSG...")
-        convert_fsg_format(dataset_path, fsg_dataset)
+        print("Converting dataset for FSG and GSpan/Gaston...")
+        hash_count, node_mapping = convert_dataset(dataset_path, fsg_dataset, gspan_gaston_dataset)
 
-        print("Converting dataset for GSpan/Gaston...")
-        hash_count = convert_gspan_gaston_format(fsg_dataset, gspan_gaston_dataset)
+        # Gaston takes its support as an absolute graph count
+        with open(os.path.join(output_folder, "graph_count.txt"), 'w') as f:
+            f.write(f"{hash_count}\n")
 
-        print(f"✅ Dataset conversion complete. {hash_count} graphs detected.")
+        print(f"✅ Dataset conversion complete. {hash_count} graphs, {len(node_mapping)} node labels detected.")
 
     elif len(sys.argv) == 2:  # Plot mode
         runtime_file = sys.argv[1]
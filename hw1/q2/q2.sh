@@ -10,102 +10,45 @@ OUTPUT_PATH=$5
 # Define support values
 SUPPORT_VALUES=(5 10 25 50 95)
 
+# Number of (algorithm, support) jobs run at once, each pinned to its own core
+CORES=${CORES:-1}
+# Wall-clock limit per job in seconds
+TIMEOUT=${TIMEOUT:-3600}
+# Runs per (algorithm, support); bench_store.py compares runs with a permutation test on these
+REPEATS=${REPEATS:-3}
+
 # Ensure the output directory exists
 mkdir -p "$OUTPUT_PATH"
-RUNTIME_FILE="${OUTPUT_FOLDER}/runtime.txt"
-
-
-echo "Converting dataset for FSG..."
-python3 process_data.py "$DATASET_PATH" "$OUTPUT_PATH"
-
-echo "Converting dataset for GSpan/Gaston..."
-python3 process_data.py "$DATASET_PATH" "$OUTPUT_PATH"
-
-# Count the number of graph transactions (lines with #) for Gaston
-HASH_COUNT=$(grep -c '#' "$OUTPUT_PATH/gspan_gaston_dataset.txt")
-
-# Loop through support values and run the algorithms
-for support in "${SUPPORT_VALUES[@]}"; do
-    echo "Running FSG with support=$support..."
-    START_TIME=$(date +%s.%N)
-
-    # Run FSG with a timeout of 1 second
-    timeout 3600 "$FSG_PATH" -s "$support" "$OUTPUT_PATH/fsg_dataset.txt"
-    EXIT_CODE=$?  # Store exit code immediately
-
-    END_TIME=$(date +%s.%N)  # Capture end time
-
-    # Compute precise elapsed time
-    ELAPSED_TIME=$(awk "BEGIN {print $END_TIME - $START_TIME}")
-
-    if [ $EXIT_CODE -eq 124 ]; then
-        echo "FSG timeout at support=$support after ${ELAPSED_TIME} seconds, creating empty file."
-        touch "$OUTPUT_PATH/fsg_${support}"
-        echo "$support,FSG,$ELAPSED_TIME" >> "$OUTPUT_PATH/runtime.txt"
-    elif [ -f "$OUTPUT_PATH/fsg_dataset.fp" ]; then
-        mv "$OUTPUT_PATH/fsg_dataset.fp" "$OUTPUT_PATH/fsg_${support}"
-        echo "$support,FSG,$ELAPSED_TIME" >> "$OUTPUT_PATH/runtime.txt"
-    else
-        echo "FSG failed at support=$support, no output file produced."
-        touch "$OUTPUT_PATH/fsg_${support}"
-        echo "$support,FSG,FAILED" >> "$OUTPUT_PATH/runtime.txt"
-    fi
-
-    echo "Running GSpan with support=$support..."
-    START_TIME=$(date +%s.%N)
-
-    # Run GSpan with timeout of 3600s
-    timeout 3600 "$GSPAN_PATH" -f "$OUTPUT_PATH/gspan_gaston_dataset.txt" -s $(echo "$support * 0.01" | bc) -o
-    EXIT_CODE=$?  # Store exit code immediately
-
-    END_TIME=$(date +%s.%N)
-
-    # Compute precise elapsed time
-    ELAPSED_TIME=$(awk "BEGIN {print $END_TIME - $START_TIME}")
-
-    if [ $EXIT_CODE -eq 124 ]; then
-        echo "GSpan timeout at support=$support, creating empty file."
-        touch "$OUTPUT_PATH/gspan_${support}"
-        echo "$support,GSpan,$ELAPSED_TIME" >> "$OUTPUT_PATH/runtime.txt"
-    elif [ -f "$OUTPUT_PATH/gspan_gaston_dataset.txt.fp" ]; then
-        mv "$OUTPUT_PATH/gspan_gaston_dataset.txt.fp" "$OUTPUT_PATH/gspan_${support}"
-        echo "$support,GSpan,$ELAPSED_TIME" >> "$OUTPUT_PATH/runtime.txt"
-    else
-        echo "GSpan failed at support=$support, no output file produced."
-        touch "$OUTPUT_PATH/gspan_${support}"
-        echo "$support,GSpan,FAILED" >> "$OUTPUT_PATH/runtime.txt"
-    fi
-
-    echo "Running Gaston with support=$support..."
-    START_TIME=$(date +%s.%N)
-
-    # Run Gaston with timeout of 3600s
-    timeout 3600 "$GASTON_PATH" "$(echo "$support * 0.01 * $HASH_COUNT" | bc)" "$OUTPUT_PATH/gspan_gaston_dataset.txt" > "$OUTPUT_PATH/gaston_${support}"
-    EXIT_CODE=$?  # Store exit code immediately
-
-    END_TIME=$(date +%s.%N)
-
-    # Compute precise elapsed time
-    ELAPSED_TIME=$(awk "BEGIN {print $END_TIME - $START_TIME}")
-
-    if [ $EXIT_CODE -eq 124 ]; then
-        echo "Gaston timeout at support=$support, creating empty file."
-        touch "$OUTPUT_PATH/gaston_${support}.txt"
-        echo "$support,Gaston,3600" >> "$OUTPUT_PATH/runtime.txt"
-    else
-        echo "$support,Gaston,$ELAPSED_TIME" >> "$OUTPUT_PATH/runtime.txt"
-    fi
-done
+RUNTIME_FILE="$OUTPUT_PATH/runtime.json"
 
+# Convert the dataset once, then run FSG, GSpan and Gaston for every support value.
+# Wall times, user/system CPU times, peak RSS and the status (ok, timeout, failed)
+# of every (algorithm, support) are saved in runtime.json.
+python3 bench_miners.py "$GSPAN_PATH" "$FSG_PATH" "$GASTON_PATH" "$DATASET_PATH" "$OUTPUT_PATH" \
+    --supports "${SUPPORT_VALUES[@]}" --cores "$CORES" --timeout "$TIMEOUT" --repeats "$REPEATS"
 
 echo "Generating runtime plot..."
-python3 process_data.py "$OUTPUT_PATH/runtime.txt"
-
-#python3 $(pwd)/process_data.py $(pwd)/out2/runtime.txt
-#python3 process_data.py --plot "$RUNTIME_FILE" || { echo "Error: Plot generation failed"; exit 1; }
+python3 process_data.py "$RUNTIME_FILE"
+
+# Keep the results in the benchmark store (BENCH_STORE) and compare with the previous run on this dataset
+python3 ../bench_store.py record "$RUNTIME_FILE" --dataset "$DATASET_PATH" \
+    --binary gspan="$GSPAN_PATH" fsg="$FSG_PATH" gaston="$GASTON_PATH"
+python3 ../bench_store.py compare previous --plot "$OUTPUT_PATH/regression_plot.png"
+
+# Optionally check that the miners agree (CROSSCHECK=1): patterns are stored by minimum DFS code,
+# and the per-miner counts and mismatch lists of every support value are reported
+if [ "${CROSSCHECK:-0}" = "1" ]; then
+    PATTERN_STORE="$OUTPUT_PATH/patterns.pst"
+    rm -f "$PATTERN_STORE"
+    for SUPPORT in "${SUPPORT_VALUES[@]}"; do
+        python3 ../pattern_store.py "$PATTERN_STORE" ingest \
+            "$OUTPUT_PATH/fsg_$SUPPORT" "$OUTPUT_PATH/gspan_$SUPPORT" "$OUTPUT_PATH/gaston_$SUPPORT"
+        python3 ../pattern_store.py "$PATTERN_STORE" crosscheck --support "$SUPPORT" \
+            --output-dir "$OUTPUT_PATH/crosscheck_$SUPPORT"
+    done
+fi
 
 rm -f "$OUTPUT_PATH/fsg_dataset.txt"
 rm -f "$OUTPUT_PATH/gspan_gaston_dataset.txt"
-rm -f "$OUTPUT_PATH/runtime.txt"
+rm -f "$OUTPUT_PATH/graph_count.txt"
 echo "All processes completed!"
-
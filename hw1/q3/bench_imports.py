@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+Q3_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand invocations on the fixtures written by make_fixtures, in pipeline order
+COMMANDS = [
+    ("preprocess", ["graphs.txt", "pre_proc.txt"]),
+    ("tid2csv", ["pre_proc.tid", "mproc_tid.csv"]),
+    ("label", ["mproc_tid.csv", "labels.txt", "labelled.csv"]),
+    ("select", ["labelled.csv", "--max-features", "5", "--seed", "0"]),
+    ("extract", ["selected_features.txt", "pre_proc.fp", "subgraphs.txt"]),
+    ("featurize", ["pre_proc.txt", "subgraphs.txt", "features.npy"]),
+]
+
+
+def make_fixtures(directory, num_graphs=60, num_patterns=12, seed=0):
+    """Write small raw graphs, an FSG-style .tid/.fp pair and labels into directory."""
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "graphs.txt"), 'w') as f:
+        for _ in range(num_graphs):
+            num_nodes = rng.randint(3, 8)
+            f.write("#\n")
+            for node in range(num_nodes):
+                f.write(f"v {node} {rng.randint(1, 4)}\n")
+            for node in range(1, num_nodes):
+                f.write(f"e {rng.randrange(node)} {node} {rng.randint(1, 2)}\n")
+    with open(os.path.join(directory, "labels.txt"), 'w') as f:
+        f.write("".join(f"{tid % 2}\n" for tid in range(num_graphs)))
+    with open(os.path.join(directory, "pre_proc.tid"), 'w') as tid_file, \
+            open(os.path.join(directory, "pre_proc.fp"), 'w') as fp_file:
+        for k in range(num_patterns):
+            tids = sorted(rng.sample(range(num_graphs), rng.randint(num_graphs // 4, 3 * num_graphs // 4)))
+            tid_file.write(f"1-{k} " + " ".join(map(str, tids)) + "\n")
+            fp_file.write(f"t # 1-{k}, {len(tids)}\nv 0 {rng.randint(1, 4)}\nv 1 {rng.randint(1, 4)}\n"
+                          f"u 0 1 {rng.randint(1, 2)}\n")
+
+
+def parse_importtime(stderr):
+    """Total top-level import time (seconds) and the heaviest top-level imports from -X importtime output."""
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # Column header
+        if not name.startswith("  "):  # Nested imports are indented further
+            top_level.append((int(cumulative) / 1e6, name.strip()))
+    return sum(seconds for seconds, _ in top_level), sorted(top_level, reverse=True)
+
+
+def run_command(directory, command, arguments):
+    """Run one subcommand in a fresh interpreter; return (wall seconds, import seconds, heaviest imports)."""
+    env = dict(os.environ, PYTHONPATH=Q3_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-m", "cli", command] + arguments, cwd=directory,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(f"Error: '{command}' failed:\n" +
+              "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:")))
+        sys.exit(1)
+    imports, heaviest = parse_importtime(result.stderr)
+    return wall, imports, heaviest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold start of every 'python -m cli' subcommand.")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per subcommand (median reported)")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest top-level imports listed per subcommand")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        make_fixtures(directory)
+        print(f"{'subcommand':<12}{'wall (s)':>10}{'imports (s)':>13}  heaviest imports")
+        for command, arguments in COMMANDS:
+            runs = [run_command(directory, command, arguments) for _ in range(max(1, args.repeats))]
+            wall = statistics.median(run[0] for run in runs)
+            imports = statistics.median(run[1] for run in runs)
+            heaviest = ", ".join(f"{name} {seconds:.2f}" for seconds, name in runs[-1][2][:args.top])
+            print(f"{command:<12}{wall:>10.2f}{imports:>13.2f}  {heaviest}")
@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.feature_selection import RFE
+from sklearn.model_selection import cross_val_score
+
+from feature_pattern import fast_rfe, load_sparse_labelled
+
+
+def exact_rfe(X, y, n_features_to_select):
+    """The RFE used by feature_selection: step=1 with a liblinear LogisticRegression."""
+    rfe = RFE(LogisticRegression(max_iter=10000, solver='liblinear'), n_features_to_select=n_features_to_select)
+    rfe.fit(X, y)
+    return rfe.support_
+
+
+def accuracy(X, y, support):
+    """5-fold accuracy of a LogisticRegression trained on the selected columns."""
+    model = LogisticRegression(max_iter=10000, solver='liblinear')
+    return cross_val_score(model, X[:, support], y, cv=5).mean()
+
+
+def run(X, y, n_features, steps, subsamples, repeats):
+    """Time exact RFE and every fast (step, subsample) variant; compare selections with the exact one."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        reference = exact_rfe(X, y, n_features)
+        timings.append(time.perf_counter() - start)
+    exact_time = float(np.median(timings))
+    exact_accuracy = accuracy(X, y, reference)
+    print(f"{'mode':<28}{'time (s)':>10}{'speedup':>9}{'overlap':>9}{'jaccard':>9}{'cv acc':>8}")
+    print(f"{'exact (step=1)':<28}{exact_time:>10.2f}{1.0:>9.1f}{1.0:>9.2f}{1.0:>9.2f}{exact_accuracy:>8.3f}")
+
+    for step in steps:
+        for subsample in subsamples:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                support = fast_rfe(X, y, n_features, step=step, subsample=subsample)
+                timings.append(time.perf_counter() - start)
+            elapsed = float(np.median(timings))
+            common = np.sum(support & reference)
+            jaccard = common / np.sum(support | reference)
+            mode = f"fast step={step} sub={subsample if subsample is not None else 'all'}"
+            print(f"{mode:<28}{elapsed:>10.2f}{exact_time / elapsed:>9.1f}{common / n_features:>9.2f}"
+                  f"{jaccard:>9.2f}{accuracy(X, y, support):>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare exact and fast RFE on a labelled TID x pattern table.")
+    parser.add_argument("input", help="labelled.csv (TID, patterns, Label) or a sparse .npz from convert_tid_to_csv.py")
+    parser.add_argument("labels_file", nargs="?", default=None, help="Labels file, required with a .npz input")
+    parser.add_argument("--max-features", type=int, default=100)
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.1, 0.2, 0.3])
+    parser.add_argument("--subsamples", type=float, nargs="+", default=None,
+                        help="Stratified subsample fractions for the fast mode (default: all rows only)")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per mode; the median time is reported")
+    args = parser.parse_args()
+
+    if args.input.endswith('.npz'):
+        if args.labels_file is None:
+            parser.error("a labels file is required with a .npz input")
+        df = load_sparse_labelled(args.input, args.labels_file)
+    else:
+        df = pd.read_csv(args.input)
+    X = df.drop(columns=['TID', 'Label']).to_numpy(dtype=np.float64)
+    y = df['Label'].to_numpy()
+    n_features = min(args.max_features, X.shape[1])
+    print(f"{X.shape[0]} rows, {X.shape[1]} features, selecting {n_features}")
+
+    run(X, y, n_features, args.steps, [None] + (args.subsamples or []), args.repeats)
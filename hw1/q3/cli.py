@@ -0,0 +1,122 @@
+import argparse
+import os
+import runpy
+import sys
+import time
+
+import tracing
+
+# One entry point for the q3 scripts: python -m cli <subcommand> ...
+# Every handler imports the modules it needs when it runs, and arguments and
+# input files are checked before that, so a subcommand only pays for its own
+# imports (extract does not load scikit-learn or shap) and bad calls fail fast.
+
+
+def _require(*paths):
+    for path in paths:
+        if path is not None and not os.path.exists(path):
+            print(f"Error: File '{path}' does not exist.")
+            sys.exit(1)
+
+
+def run_preprocess(args):
+    _require(None if args.input == '-' else args.input)
+    from preprocess import preprocess_file
+
+    preprocess_file(args.input, args.output)
+
+
+def run_tid2csv(args):
+    _require(args.tid_file)
+    from convert_tid_to_csv import process_file, process_file_sparse
+
+    if args.output.endswith('.npz'):
+        process_file_sparse(args.tid_file, args.output)
+    else:
+        process_file(args.tid_file, args.output)
+
+
+def run_label(args):
+    _require(args.input_csv, args.labels_file)
+    from map_tid_to_labels import map_tid_to_txt_line
+
+    map_tid_to_txt_line(args.input_csv, args.labels_file, args.output_csv)
+
+
+def run_select(args):
+    if args.input.endswith('.npz') and args.labels is None:
+        print("Error: a labels file is required with a sparse .npz input.")
+        sys.exit(1)
+    _require(args.input, args.labels)
+    from feature_pattern import eslr_feature_selection
+
+    start = time.time()
+    selected = eslr_feature_selection(args.input, args.output, args.max_features, args.labels, args.cache_dir,
+                                      args.seed)
+    print(f"Selected {len(selected)} features in {time.time() - start:.2f} seconds")
+
+
+def run_extract(args):
+    _require(args.features_file, args.graph_file)
+    from feature_pattern import extract_patterns
+
+    extract_patterns(args.features_file, args.graph_file, args.output_file)
+
+
+def run_featurize(args):
+    # feature_select.py keeps its own options; its argument parser runs as if it were called directly
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_select.py")
+    sys.argv = [script] + args.arguments
+    runpy.run_path(script, run_name="__main__")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Run the q3 pipeline steps.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("preprocess", help="Raw graphs -> FSG input (preprocess.py)")
+    command.add_argument("input", help="Raw graph file, graph store or '-' for stdin")
+    command.add_argument("output", nargs="?", default="pre_proc.txt", help="Output file or '-' (default pre_proc.txt)")
+    command.set_defaults(handler=run_preprocess)
+
+    command = commands.add_parser("tid2csv", help="FSG .tid -> TID x pattern CSV or sparse .npz (convert_tid_to_csv.py)")
+    command.add_argument("tid_file")
+    command.add_argument("output", help="Output .csv, or .npz for the sparse matrix")
+    command.set_defaults(handler=run_tid2csv)
+
+    command = commands.add_parser("label", help="Add the Label column to a TID CSV (map_tid_to_labels.py)")
+    command.add_argument("input_csv")
+    command.add_argument("labels_file")
+    command.add_argument("output_csv")
+    command.set_defaults(handler=run_label)
+
+    command = commands.add_parser("select", help="Ensemble feature selection; writes the table and selected_features.txt")
+    command.add_argument("input", help="labelled.csv, or a sparse .npz with --labels")
+    command.add_argument("output", nargs="?", default="selected_features.csv")
+    command.add_argument("--labels", default=None, help="Labels file, required with a .npz input")
+    command.add_argument("--max-features", type=int, default=100)
+    command.add_argument("--cache-dir", default=None, help="Reuse feature-selection stages cached here (requires --seed)")
+    command.add_argument("--seed", type=int, default=None)
+    command.set_defaults(handler=run_select)
+
+    command = commands.add_parser("extract", help="Copy the selected patterns out of the .fp file or graph store")
+    command.add_argument("features_file", help="One pattern id per line, e.g. selected_features.txt")
+    command.add_argument("graph_file", help="FSG .fp file or graph store")
+    command.add_argument("output_file")
+    command.set_defaults(handler=run_extract)
+
+    command = commands.add_parser("featurize", help="Feature matrix of graphs (feature_select.py; same arguments)",
+                                  add_help=False)
+    command.add_argument("arguments", nargs=argparse.REMAINDER)
+    command.set_defaults(handler=run_featurize)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with tracing.stage(f"cli.{args.command}"):
+        args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
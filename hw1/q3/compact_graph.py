@@ -0,0 +1,202 @@
+import numpy as np
+
+
+class CompactGraph:
+    """Undirected labelled graph stored as CSR arrays.
+
+    Node i has label labels[i]; its neighbours are
+    indices[indptr[i]:indptr[i + 1]] (sorted) with the matching edge weights
+    in weights. Self-loops are not represented.
+    """
+
+    __slots__ = ("labels", "indptr", "indices", "weights")
+
+    def __init__(self, labels, indptr, indices, weights):
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @classmethod
+    def from_edges(cls, labels, edges):
+        """Build a graph from node labels and a list of (u, v, weight) edges.
+
+        Repeated edges keep the last weight, as nx.Graph.add_edge does.
+        """
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 3)
+        return cls.from_arrays(labels, edges[:, :2], edges[:, 2])
+
+    @classmethod
+    def from_arrays(cls, labels, endpoints, weights):
+        """Build a graph from a label array, an (m, 2) endpoint array and m weights.
+
+        Same semantics as from_edges; used for graphs read from a graph store.
+        """
+        n = len(labels)
+        endpoints = np.asarray(endpoints, dtype=np.int32).reshape(-1, 2)
+        weights = np.asarray(weights, dtype=np.int32)
+        keep = endpoints[:, 0] != endpoints[:, 1]
+        low = np.minimum(endpoints[:, 0], endpoints[:, 1])[keep]
+        high = np.maximum(endpoints[:, 0], endpoints[:, 1])[keep]
+        weights = weights[keep]
+        # Keep the last occurrence of every repeated edge
+        keys = low.astype(np.int64) * max(n, 1) + high
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        low, high, weights = low[last], high[last], weights[last]
+        src = np.concatenate([low, high])
+        dst = np.concatenate([high, low])
+        weights = np.concatenate([weights, weights])
+        order = np.lexsort((dst, src))
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(np.asarray(labels, dtype=np.int32), indptr, dst[order], weights[order])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def number_of_nodes(self):
+        return len(self.labels)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def degrees(self):
+        """Return the degree of every node as an array."""
+        return np.diff(self.indptr)
+
+    def neighbors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edges(self):
+        """Yield every edge once as (u, v, weight) with u < v."""
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        weights = self.weights.tolist()
+        for u in range(len(indptr) - 1):
+            for k in range(indptr[u], indptr[u + 1]):
+                if indices[k] > u:
+                    yield u, indices[k], weights[k]
+
+    def to_networkx(self):
+        """Convert to an nx.Graph with 'label' and 'weight' attributes."""
+        import networkx as nx
+
+        graph = nx.Graph()
+        for node, label in enumerate(self.labels.tolist()):
+            graph.add_node(node, label=label)
+        for u, v, w in self.edges():
+            graph.add_edge(u, v, weight=w)
+        return graph
+
+
+def match_plan(pattern, induced=True, edge_labels=False):
+    """Precompute the search order used to match a pattern.
+
+    Returns one step per pattern node: (label, degree, parent, neighbours,
+    non-neighbours, weights), where parent and the two lists refer to
+    earlier steps. Nodes are ordered so that every step after the first of a
+    connected component has an already placed neighbour to draw candidates
+    from. Without induced, non-neighbours are not checked (monomorphism);
+    with edge_labels, weights lists the edge weight to each neighbour.
+    """
+    n = len(pattern)
+    labels = pattern.labels.tolist()
+    degrees = pattern.degrees().tolist()
+    adjacency = []
+    for node in range(n):
+        start, end = pattern.indptr[node], pattern.indptr[node + 1]
+        adjacency.append(dict(zip(pattern.indices[start:end].tolist(), pattern.weights[start:end].tolist())))
+
+    order = []
+    position = {}
+    remaining = set(range(n))
+    while remaining:
+        # Prefer the node with most placed neighbours, then the highest degree
+        node = max(remaining, key=lambda v: (sum(u in position for u in adjacency[v]), degrees[v], -v))
+        position[node] = len(order)
+        order.append(node)
+        remaining.discard(node)
+
+    plan = []
+    for step, node in enumerate(order):
+        earlier = order[:step]
+        neighbors = [position[u] for u in earlier if u in adjacency[node]]
+        non_neighbors = [position[u] for u in earlier if u not in adjacency[node]] if induced else []
+        weights = [adjacency[node][order[k]] for k in neighbors] if edge_labels else None
+        parent = neighbors[0] if neighbors else -1
+        plan.append((labels[node], degrees[node], parent, neighbors, non_neighbors, weights))
+    return plan
+
+
+class SubgraphMatcher:
+    """Subgraph matcher for a CompactGraph target.
+
+    With a default match plan this is equivalent to networkx
+    GraphMatcher(graph, pattern, node_match=label
+    equality).subgraph_is_isomorphic(), but running on plain Python lists.
+    """
+
+    __slots__ = ("labels", "adjacency", "degrees", "nodes_by_label")
+
+    def __init__(self, graph):
+        self.labels = graph.labels.tolist()
+        indptr = graph.indptr.tolist()
+        indices = graph.indices.tolist()
+        weights = graph.weights.tolist()
+        self.adjacency = [dict(zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                          for i in range(len(self.labels))]
+        self.degrees = [indptr[i + 1] - indptr[i] for i in range(len(self.labels))]
+        self.nodes_by_label = {}
+        for node, label in enumerate(self.labels):
+            self.nodes_by_label.setdefault(label, []).append(node)
+
+    def contains(self, plan):
+        """Check whether the pattern compiled into plan occurs in the graph."""
+        labels = self.labels
+        adjacency = self.adjacency
+        degrees = self.degrees
+        image = [0] * len(plan)
+        used = set()
+
+        def extend(step):
+            if step == len(plan):
+                return True
+            label, degree, parent, neighbors, non_neighbors, weights = plan[step]
+            if parent >= 0:
+                candidates = adjacency[image[parent]]
+            else:
+                candidates = self.nodes_by_label.get(label, ())
+            for node in candidates:
+                if node in used or labels[node] != label or degrees[node] < degree:
+                    continue
+                adj = adjacency[node]
+                if weights is None:
+                    if any(image[k] not in adj for k in neighbors):
+                        continue
+                elif any(adj.get(image[k]) != w for k, w in zip(neighbors, weights)):
+                    continue
+                if any(image[k] in adj for k in non_neighbors):
+                    continue
+                image[step] = node
+                used.add(node)
+                if extend(step + 1):
+                    return True
+                used.discard(node)
+            return False
+
+        return extend(0)
+
+
+def subgraph_is_isomorphic(graph, pattern):
+    """Check whether pattern is a node-induced subgraph of graph (labels must match)."""
+    return SubgraphMatcher(graph).contains(match_plan(pattern))
+
+
+def subgraph_is_monomorphic(graph, pattern, edge_labels=True):
+    """Check whether pattern is a (not necessarily induced) subgraph of graph.
+
+    With edge_labels, edge weights must match too; this is the containment
+    FSG uses for its support counts and .tid lists.
+    """
+    return SubgraphMatcher(graph).contains(match_plan(pattern, induced=False, edge_labels=edge_labels))
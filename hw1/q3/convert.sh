@@ -17,6 +17,37 @@ FEATURE_OUTPUT=$3
 # Define intermediate output file
 PROCESSED_GRAPH="pre_proc.txt"
 
+# Number of featurization worker processes (0 = all cores)
+WORKERS=${WORKERS:-1}
+# Subgraph matching semantics: induced (default) or fsg (matches .tid-based training features)
+SEMANTICS=${SEMANTICS:-induced}
+# Set Q3_TRACE to a directory to trace every stage (Chrome trace-event JSON and a summary table, see tracing.py)
+Q3_TRACE=${Q3_TRACE:-}
+if [ -n "$Q3_TRACE" ]; then
+    export Q3_TRACE
+    python3 tracing.py clear "$Q3_TRACE"
+fi
+
+# With a running featurize_server.py (FEATURIZE_SOCKET), the warm server preprocesses and featurizes
+# the graphs. It refuses the batch if it was started on another subgraph set or semantics; the graphs
+# are then featurized in this process below
+if [ -n "$FEATURIZE_SOCKET" ] && [ -S "$FEATURIZE_SOCKET" ]; then
+    echo "Featurizing $INPUT_GRAPH through the server at $FEATURIZE_SOCKET..."
+    STATUS=0
+    python3 featurize_client.py "$FEATURIZE_SOCKET" "$INPUT_GRAPH" "$FEATURE_OUTPUT" \
+        --subgraphs "$SUBGRAPHS" --semantics "$SEMANTICS" || STATUS=$?
+    if [ "$STATUS" -eq 0 ]; then
+        if [ -n "$Q3_TRACE" ]; then
+            python3 tracing.py merge "$Q3_TRACE"
+        fi
+        echo "Feature extraction completed. Output saved to $FEATURE_OUTPUT"
+        exit 0
+    elif [ "$STATUS" -ne 3 ]; then
+        exit "$STATUS"
+    fi
+    echo "The server does not serve $SUBGRAPHS with $SEMANTICS semantics; featurizing in this process instead."
+fi
+
 # Run preprocess.py
 echo "Running preprocessing on $INPUT_GRAPH..."
 python3 preprocess1.py "$INPUT_GRAPH"
@@ -29,7 +60,7 @@ fi
 
 # Run feature_select.py
 echo "Extracting features using $PROCESSED_GRAPH and $SUBGRAPHS..."
-python3 feature_select.py "$PROCESSED_GRAPH" "$SUBGRAPHS" "$FEATURE_OUTPUT"
+python3 feature_select.py "$PROCESSED_GRAPH" "$SUBGRAPHS" "$FEATURE_OUTPUT" --workers "$WORKERS" --semantics "$SEMANTICS"
 
 # Ensure feature extraction succeeded
 if [ ! -f "$FEATURE_OUTPUT" ]; then
@@ -37,5 +68,9 @@ if [ ! -f "$FEATURE_OUTPUT" ]; then
     exit 1
 fi
 
+if [ -n "$Q3_TRACE" ]; then
+    python3 tracing.py merge "$Q3_TRACE"
+fi
+
 echo "Feature extraction completed. Output saved to $FEATURE_OUTPUT"
 
@@ -3,6 +3,10 @@ import os
 import csv
 from collections import defaultdict
 
+import numpy as np
+
+import tracing
+
 def process_file(input_filename, output_filename):
     if not os.path.exists(input_filename):
         print(f"Error: File '{input_filename}' not found.")
@@ -13,7 +17,7 @@ def process_file(input_filename, output_filename):
     ranges_set = set()  # To store all unique ranges (range strings)
 
     # Read the .tid file line by line
-    with open(input_filename, 'r') as infile:
+    with tracing.stage("tid2csv", unit="patterns") as traced, open(input_filename, 'r') as infile:
         for line in infile:
             parts = line.strip().split()
             if not parts:
@@ -26,11 +30,12 @@ def process_file(input_filename, output_filename):
             
             for num in numbers:
                 result[num][range_str] = 1  # Mark the presence of the range for this TID
+        traced.items = len(ranges_set)
 
     sorted_ranges = sorted(ranges_set)  # Sort for consistent column order
 
     # Write CSV output
-    with open(output_filename, 'w', newline='') as csvfile:
+    with tracing.stage("tid2csv.write", len(result), unit="rows"), open(output_filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile, quotechar='"', quoting=csv.QUOTE_NONE)
         writer.writerow(['TID'] + sorted_ranges)  # Header row
         
@@ -40,11 +45,73 @@ def process_file(input_filename, output_filename):
     
     print(f"File processed and saved as {output_filename}")
 
+def read_tid_sparse(input_filename):
+    """Stream a .tid file into the CSR arrays of the TID x pattern matrix.
+
+    Only the TID lists are kept, so memory is proportional to the number of
+    ones. Rows and columns follow the CSV order (sorted TIDs, sorted pattern
+    names). Returns a dict with indptr, indices and shape of the matrix plus
+    the 'tids' and 'patterns' index arrays.
+    """
+    if not os.path.exists(input_filename):
+        print(f"Error: File '{input_filename}' not found.")
+        sys.exit(1)
+
+    patterns = []  # Pattern name of every .tid line
+    column_tids = []  # TIDs of every .tid line
+    with tracing.stage("tid2csv", unit="patterns") as traced:
+        with open(input_filename, 'r') as infile:
+            for line in infile:
+                parts = line.split()
+                if not parts:
+                    continue
+                patterns.append(parts[0])
+                column_tids.append(np.fromiter(map(int, parts[1:]), dtype=np.int64, count=len(parts) - 1))
+        traced.items = len(patterns)
+
+        sorted_ranges = sorted(set(patterns))
+        column_of = {range_str: i for i, range_str in enumerate(sorted_ranges)}
+        num_columns = max(len(sorted_ranges), 1)
+        cols = np.concatenate([np.zeros(0, dtype=np.int64)] +
+                              [np.full(len(t), column_of[name], dtype=np.int64)
+                               for name, t in zip(patterns, column_tids)])
+        tids, rows = np.unique(np.concatenate([np.zeros(0, dtype=np.int64)] + column_tids), return_inverse=True)
+
+        # Sorting the flat (row, column) keys orders the ones row by row and drops repeats
+        rows, cols = np.divmod(np.unique(rows.reshape(-1) * num_columns + cols), num_columns)
+        indptr = np.zeros(len(tids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(tids)), out=indptr[1:])
+
+    return {'indptr': indptr, 'indices': cols.astype(np.int32), 'shape': np.array([len(tids), len(sorted_ranges)]),
+            'tids': tids, 'patterns': np.array(sorted_ranges, dtype=str)}
+
+def process_file_sparse(input_filename, output_filename):
+    """Write the TID x pattern matrix as a CSR .npz instead of a dense CSV."""
+    np.savez(output_filename, **read_tid_sparse(input_filename))
+    print(f"File processed and saved as {output_filename}")
+
+def to_csr(arrays):
+    """Turn read_tid_sparse arrays (or a loaded .npz) into (csr_matrix, tids, pattern names)."""
+    from scipy.sparse import csr_matrix
+
+    indices = arrays['indices']
+    matrix = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, arrays['indptr']),
+                        shape=tuple(arrays['shape']))
+    return matrix, arrays['tids'], arrays['patterns'].tolist()
+
+def load_sparse(filename):
+    """Load a .npz written by process_file_sparse as (csr_matrix, tids, pattern names)."""
+    with np.load(filename) as data:
+        return to_csr(data)
+
 if __name__ == "__main__":
     if len(sys.argv) != 3:
-        print("Usage: python convert_tid_to_csv.py <input_tid_file> <output_csv_file>")
+        print("Usage: python convert_tid_to_csv.py <input_tid_file> <output_csv_file|output_npz_file>")
         sys.exit(1)
     
     input_filename = sys.argv[1]
     output_filename = sys.argv[2]
-    process_file(input_filename, output_filename)
+    if output_filename.endswith('.npz'):
+        process_file_sparse(input_filename, output_filename)
+    else:
+        process_file(input_filename, output_filename)
@@ -0,0 +1,86 @@
+def _extension_key(edge):
+    """Order rightmost-path extensions of the same code as gSpan does.
+
+    Backward edges come first (smaller target first), then forward edges
+    from the deepest rightmost-path vertex, then by edge and vertex label.
+    """
+    i, j, _, edge_label, to_label = edge
+    if j < i:
+        return (0, j, edge_label)
+    return (1, -i, edge_label, to_label)
+
+
+def min_dfs_code(labels, edges):
+    """Compute the minimum DFS code of a connected labelled graph.
+
+    labels lists the node labels and edges holds (u, v, edge_label) tuples.
+    Returns (code, order): code is the list of (i, j, label_i, edge_label,
+    label_j) tuples of the minimum DFS code, order maps DFS index to node.
+    A graph without edges has the empty code.
+    """
+    adjacency = [dict() for _ in labels]
+    for u, v, w in edges:
+        if u != v:
+            adjacency[u][v] = w
+            adjacency[v][u] = w
+    num_edges = sum(len(neighbors) for neighbors in adjacency) // 2
+    if num_edges == 0:
+        return [], list(range(min(len(labels), 1)))
+
+    first = min((labels[u], w, labels[v]) for u in range(len(labels)) for v, w in adjacency[u].items())
+    code = [(0, 1) + first]
+    # A state is (DFS index -> node, used edges, rightmost path of DFS indices)
+    states = [([u, v], {frozenset((u, v))}, [0, 1])
+              for u in range(len(labels)) for v, w in adjacency[u].items()
+              if (labels[u], w, labels[v]) == first]
+
+    while len(code) < num_edges:
+        best = None
+        candidates = []
+        for image, used, rmpath in states:
+            position = {node: idx for idx, node in enumerate(image)}
+            rightmost = rmpath[-1]
+            extensions = []
+            for j in rmpath[:-1]:
+                w = adjacency[image[rightmost]].get(image[j])
+                if w is not None and frozenset((image[rightmost], image[j])) not in used:
+                    extensions.append(((rightmost, j, labels[image[rightmost]], w, labels[image[j]]), None))
+            for i in reversed(rmpath):
+                for neighbor, w in adjacency[image[i]].items():
+                    if neighbor not in position:
+                        extensions.append(((i, len(image), labels[image[i]], w, labels[neighbor]), neighbor))
+            for edge, neighbor in extensions:
+                key = _extension_key(edge)
+                if best is None or key < best[0]:
+                    best = (key, edge)
+                    candidates = []
+                if key == best[0]:
+                    candidates.append((image, used, rmpath, edge, neighbor))
+        edge = best[1]
+        code.append(edge)
+        states = []
+        for image, used, rmpath, (i, j, _, _, _), neighbor in candidates:
+            if neighbor is None:
+                states.append((image, used | {frozenset((image[i], image[j]))}, rmpath))
+            else:
+                states.append((image + [neighbor], used | {frozenset((image[i], neighbor))},
+                               rmpath[:rmpath.index(i) + 1] + [len(image)]))
+    return code, states[0][0]
+
+
+def is_connected(num_nodes, edges):
+    """Check whether a graph with the given (u, v, ...) edges is connected."""
+    if num_nodes <= 1:
+        return True
+    adjacency = [[] for _ in range(num_nodes)]
+    for edge in edges:
+        adjacency[edge[0]].append(edge[1])
+        adjacency[edge[1]].append(edge[0])
+    seen = {0}
+    stack = [0]
+    while stack:
+        for neighbor in adjacency[stack.pop()]:
+            if neighbor not in seen:
+                seen.add(neighbor)
+                stack.append(neighbor)
+    return len(seen) == num_nodes
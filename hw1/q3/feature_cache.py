@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from compact_graph import CompactGraph
+
+
+def _labels_and_edges(graph):
+    """Return (labels, [(u, v, weight)]) of a CompactGraph or nx.Graph with nodes renumbered 0..n-1."""
+    if isinstance(graph, CompactGraph):
+        return graph.labels.tolist(), list(graph.edges())
+    position = {node: i for i, node in enumerate(graph.nodes())}
+    labels = [label for _, label in graph.nodes(data='label')]
+    edges = [(position[u], position[v], w) for u, v, w in graph.edges(data='weight')]
+    return labels, edges
+
+
+def canonical_graph_hash(graph):
+    """Hash a graph so that identical and (typically) isomorphic copies collide.
+
+    Nodes are ordered by Weisfeiler-Lehman colour refinement over node
+    labels and edge weights, ties broken by input order, and the relabelled
+    graph is hashed exactly. Equal hashes therefore always mean isomorphic
+    graphs; reordered copies are only missed when refinement leaves ties.
+    """
+    labels, edges = _labels_and_edges(graph)
+    n = len(labels)
+    adjacency = [[] for _ in range(n)]
+    for u, v, w in edges:
+        adjacency[u].append((v, w))
+        adjacency[v].append((u, w))
+    distinct = sorted(set(labels))
+    colors = [distinct.index(label) for label in labels]
+    num_colors = len(distinct)
+    for _ in range(n):
+        signatures = [(colors[v], tuple(sorted((w, colors[u]) for u, w in adjacency[v]))) for v in range(n)]
+        ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures)))}
+        colors = [ranks[signature] for signature in signatures]
+        if len(ranks) == num_colors:
+            break
+        num_colors = len(ranks)
+    order = sorted(range(n), key=lambda v: (colors[v], v))
+    position = {node: i for i, node in enumerate(order)}
+    canonical_edges = sorted((min(position[u], position[v]), max(position[u], position[v]), w) for u, v, w in edges)
+    payload = repr(([labels[v] for v in order], canonical_edges))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def subgraph_set_hash(subgraphs, semantics):
+    """Hash an ordered subgraph set together with the matching semantics."""
+    digest = hashlib.sha1(semantics.encode())
+    for subgraph in subgraphs:
+        digest.update(repr(_labels_and_edges(subgraph)).encode())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """On-disk cache of feature rows keyed by (graph hash, subgraph set hash).
+
+    Rows are stored in an SQLite file. Every lookup refreshes the entry's
+    last-use stamp, and once the cache holds more than max_entries rows the
+    least recently used ones are evicted. Hit and miss counts are kept for
+    reporting.
+    """
+
+    def __init__(self, path, set_key, max_entries=1000000):
+        self.path = path
+        self.set_key = set_key
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Callers serialize access; the featurization server uses the cache from its handler threads
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS rows (graph_key TEXT, set_key TEXT, row BLOB, last_used INTEGER, "
+            "PRIMARY KEY (graph_key, set_key))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS rows_last_used ON rows (last_used)")
+
+    def get_many(self, graph_keys):
+        """Return {graph key: feature row} for the keys present in the cache."""
+        found = {}
+        unique_keys = list(dict.fromkeys(graph_keys))
+        for start in range(0, len(unique_keys), 500):
+            batch = unique_keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            cursor = self.connection.execute(
+                f"SELECT graph_key, row FROM rows WHERE set_key = ? AND graph_key IN ({placeholders})",
+                [self.set_key] + batch)
+            for graph_key, row in cursor:
+                found[graph_key] = list(row)
+        now = time.time_ns()
+        self.connection.executemany("UPDATE rows SET last_used = ? WHERE graph_key = ? AND set_key = ?",
+                                    [(now, key, self.set_key) for key in found])
+        self.connection.commit()
+        self.hits += sum(1 for key in graph_keys if key in found)
+        self.misses += sum(1 for key in graph_keys if key not in found)
+        return found
+
+    def put_many(self, rows):
+        """Store {graph key: feature row} and evict least recently used entries over the bound."""
+        now = time.time_ns()
+        self.connection.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?)",
+                                    [(key, self.set_key, bytes(row), now) for key, row in rows.items()])
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM rows").fetchone()
+        if count > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM rows WHERE rowid IN (SELECT rowid FROM rows ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+            self.evictions += count - self.max_entries
+        self.connection.commit()
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        print(f"Feature cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+              f"{self.evictions} evictions.")
+
+    def close(self):
+        self.connection.close()
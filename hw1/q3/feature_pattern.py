@@ -1,121 +1,579 @@
 import numpy as np
-import pandas as pd
-import shap
 import sys
 import time
-from sklearn.linear_model import LogisticRegression, LassoCV
-from sklearn.model_selection import train_test_split
-from sklearn.feature_selection import RFE, SelectKBest, chi2, mutual_info_classif, VarianceThreshold
-from sklearn.preprocessing import StandardScaler
-from imblearn.over_sampling import SMOTE
-import csv
+import hashlib
+import mmap
+import multiprocessing
+import os
+
+# pandas, scikit-learn, imbalanced-learn, shap and scipy take seconds to import,
+# so they are imported inside the functions that use them; pattern extraction
+# and argument checks start without them.
+import tracing
+from convert_tid_to_csv import load_sparse
+from map_tid_to_labels import read_labels
+from stage_cache import StageCache, frame_fingerprint, stage_key
+
+# Function to map every column to the first column identical to it
+def duplicate_columns(values):
+    representative = np.arange(values.shape[1])
+    seen = {}  # Column hash -> first columns with that hash
+    for j in range(values.shape[1]):
+        column = np.ascontiguousarray(values[:, j])
+        key = hashlib.blake2b(column.tobytes(), digest_size=16).digest()
+        for i in seen.get(key, ()):
+            if np.array_equal(values[:, i], column):
+                representative[j] = i
+                break
+        else:
+            seen.setdefault(key, []).append(j)
+    return representative
+
+# Function to find the columns correlated (|r| > threshold) with an earlier column, block by block
+def correlated_columns(values, threshold, block_elements=1 << 22):
+    from scipy import sparse
+
+    n, num_columns = values.shape
+    if num_columns == 0:
+        return np.zeros(0, dtype=bool)
+    width = max(1, block_elements // max(n, 1))
+    blocks = [slice(start, start + width) for start in range(0, num_columns, width)]
+    binary = all(np.all((values[:, block] == 0) | (values[:, block] == 1)) for block in blocks)
+    if binary:
+        # 0/1 columns: r follows from the counts n_a, n_b and co-occurrences n_ab
+        matrix = sparse.hstack([sparse.csc_matrix(values[:, block], dtype=np.int64) for block in blocks]).tocsc()
+        counts = np.asarray(matrix.sum(axis=0)).ravel().astype(np.float64)
+        scale = np.sqrt(counts * (n - counts))
+    else:
+        matrix = (values - values.mean(axis=0)) / values.std(axis=0, ddof=1)
+
+    drop = np.zeros(num_columns, dtype=bool)
+    step = max(1, block_elements // max(num_columns, 1))
+    for start in range(0, num_columns, step):
+        end = min(start + step, num_columns)
+        if binary:
+            both = (matrix[:, :end].T @ matrix[:, start:end]).toarray().astype(np.float64)
+            corr = (n * both - np.outer(counts[:end], counts[start:end])) / np.outer(scale[:end], scale[start:end])
+        else:
+            corr = matrix[:, :end].T @ matrix[:, start:end] / (n - 1)
+        # Only pairs i < j count, as in the upper triangle of X.corr()
+        corr[np.arange(end)[:, None] >= np.arange(start, end)[None, :]] = 0
+        drop[start:end] = (np.abs(corr) > threshold).any(axis=0)
+    return drop
 
 # Function to remove correlated features
-def remove_correlated_features(X, threshold=0.9):
-    corr_matrix = X.corr().abs()
-    upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
-    to_drop = [column for column in upper.columns if any(upper[column] > threshold)]
-    return X.drop(columns=to_drop, errors='ignore')
+# method "dense" builds the full X.corr(); "blocked" first collapses identical
+# columns by hash and then computes the remaining correlations in bounded
+# blocks (sparse co-occurrence counts for 0/1 data), giving the same drop set
+# in O(block) memory. "auto" uses the blocked path for wide matrices.
+def remove_correlated_features(X, threshold=0.9, method="auto"):
+    if method == "auto":
+        method = "blocked" if X.shape[1] > 1000 else "dense"
 
-# Function to perform feature selection
-def feature_selection(X, y, max_features=100):
-    selector = VarianceThreshold(threshold=0.01)
-    X = X.loc[:, selector.fit(X).get_support()]
+    if method == "dense":
+        corr_matrix = X.corr().abs()
+        upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
+        to_drop = [column for column in upper.columns if any(upper[column] > threshold)]
+        return X.drop(columns=to_drop, errors='ignore')
+
+    values = np.asfortranarray(X.to_numpy())
+    representative = duplicate_columns(values)
+    # Constant columns have no defined correlation and are never dropped
+    varying = values.min(axis=0) != values.max(axis=0)
+    unique = np.flatnonzero((representative == np.arange(values.shape[1])) & varying)
 
-    # Mutual Information
-    mi = mutual_info_classif(X, y)
-    selected_mi = X.columns[np.argsort(mi)[-max_features:]]
+    drop = (representative != np.arange(values.shape[1])) & varying & (threshold < 1)
+    drop[unique] = correlated_columns(values[:, unique], threshold)
+    return X.drop(columns=X.columns[drop], errors='ignore')
+
+# Function for the mutual information of 0/1 features with the class under sample weights
+def weighted_binary_mi(X, y, sample_weight):
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    w = sample_weight / sample_weight.sum()
+    p_one = w @ X
+    mi = np.zeros(X.shape[1])
+    for c in np.unique(y):
+        w_class = np.where(y == c, w, 0.0)
+        p_class = w_class.sum()
+        joint_one = w_class @ X
+        for joint, p_value in ((joint_one, p_one), (p_class - joint_one, 1.0 - p_one)):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mi += np.where(joint > 0, joint * np.log(joint / (p_value * p_class)), 0.0)
+    return mi
+
+# Function for chi2 scores with sample-weighted observed and expected counts
+def weighted_chi2(X, y, sample_weight):
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    classes = np.unique(y)
+    Y = (y[:, None] == classes[None, :]) * sample_weight[:, None]
+    observed = Y.T @ X
+    expected = np.outer(Y.sum(axis=0) / sample_weight.sum(), sample_weight @ X)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nansum((observed - expected) ** 2 / expected, axis=0)
+
+# Mutual Information
+# With sample_weight, 0/1 data uses the exact weighted MI; other data ignores the weights.
+def select_mi(X, y, max_features, sample_weight=None, random_state=None):
+    from sklearn.feature_selection import mutual_info_classif
+
+    if sample_weight is not None and np.isin(X.to_numpy(), (0, 1)).all():
+        mi = weighted_binary_mi(X, y, sample_weight)
+    else:
+        mi = mutual_info_classif(X, y, random_state=random_state)
+    return list(X.columns[np.argsort(mi)[-max_features:]])
+
+# Chi-Square (Handling Exception)
+def select_chi2(X, y, max_features, sample_weight=None):
+    from sklearn.feature_selection import SelectKBest, chi2
 
-    # Chi-Square (Handling Exception)
     try:
-        chi2_selector = SelectKBest(chi2, k=min(max_features, X.shape[1]))
+        k = min(max_features, X.shape[1])
+        if sample_weight is not None:
+            scores = weighted_chi2(X, y, sample_weight)
+            return list(X.columns[np.sort(np.argsort(scores, kind="mergesort")[-k:])])
+        chi2_selector = SelectKBest(chi2, k=k)
         chi2_selector.fit(X, y)
-        selected_chi2 = X.columns[chi2_selector.get_support()]
+        return list(X.columns[chi2_selector.get_support()])
     except:
-        selected_chi2 = []
+        return []
+
+# Fast RFE: drop a fraction of the remaining features per round, warm-starting each fit
+# from the surviving coefficients, optionally on a stratified subsample of the rows
+# (a fraction or a row count). Returns the support mask like RFE.support_.
+def fast_rfe(X, y, n_features_to_select, step=0.2, subsample=None, random_state=0, sample_weight=None):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+
+    X = np.asarray(X)
+    y = np.asarray(y)
+    if subsample is not None and subsample < (1.0 if isinstance(subsample, float) else len(y)):
+        if sample_weight is None:
+            X, _, y, _ = train_test_split(X, y, train_size=subsample, stratify=y, random_state=random_state)
+        else:
+            X, _, y, _, sample_weight, _ = train_test_split(X, y, sample_weight, train_size=subsample, stratify=y,
+                                                            random_state=random_state)
+
+    features = np.arange(X.shape[1])
+    model = LogisticRegression(max_iter=10000, solver='lbfgs', warm_start=True)
+    while len(features) > n_features_to_select:
+        model.fit(X[:, features], y, sample_weight=sample_weight)
+        importances = np.abs(model.coef_).sum(axis=0)
+        n_remove = min(max(1, int(step * len(features))), len(features) - n_features_to_select)
+        keep = np.sort(np.argsort(importances, kind='stable')[n_remove:])
+        features = features[keep]
+        model.coef_ = model.coef_[:, keep]  # Warm start of the next round
+
+    support = np.zeros(X.shape[1], dtype=bool)
+    support[features] = True
+    return support
 
-    # Recursive Feature Elimination (RFE)
-    model_rfe = LogisticRegression(max_iter=10000, solver='liblinear')
+# Recursive Feature Elimination (RFE)
+# rfe_options=None runs the exact step=1 RFE; a dict of fast_rfe keyword
+# arguments (step, subsample, random_state) runs the fast mode instead.
+def select_rfe(X, y, max_features, rfe_options=None, sample_weight=None, random_state=None):
+    from sklearn.feature_selection import RFE
+    from sklearn.linear_model import LogisticRegression
+
+    if rfe_options is not None:
+        rfe_options = {"random_state": random_state, **rfe_options}
+        support = fast_rfe(X, y, min(max_features, X.shape[1]), sample_weight=sample_weight, **rfe_options)
+        return list(X.columns[support])
+    model_rfe = LogisticRegression(max_iter=10000, solver='liblinear', random_state=random_state)
     rfe = RFE(model_rfe, n_features_to_select=min(max_features, X.shape[1]))
-    rfe.fit(X, y)
-    selected_rfe = X.columns[rfe.support_]
+    if sample_weight is None:
+        rfe.fit(X, y)
+    else:
+        rfe.fit(X, y, sample_weight=sample_weight)
+    return list(X.columns[rfe.support_])
+
+# Lasso (L1 Regularization)
+def select_lasso(X, y, max_features, sample_weight=None):
+    from sklearn.linear_model import LassoCV
+    from sklearn.preprocessing import StandardScaler
 
-    # Lasso (L1 Regularization)
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
     lasso = LassoCV(cv=5, max_iter=10000)
-    lasso.fit(X_scaled, y)
-    selected_lasso = X.columns[lasso.coef_ != 0]
+    lasso.fit(X_scaled, y, sample_weight=sample_weight)
+    return list(X.columns[lasso.coef_ != 0])
 
-    selected_features = set(selected_mi).union(set(selected_rfe), set(selected_lasso), set(selected_chi2))
-    return list(selected_features)[:max_features]
+SELECTORS = {"mi": select_mi, "chi2": select_chi2, "rfe": select_rfe, "lasso": select_lasso}
 
-# Function for ensemble feature selection
-def eslr_feature_selection(input_csv_file, output_csv_file, max_features=100):
-    df = pd.read_csv(input_csv_file)
-    X = df.drop(columns=['TID', 'Label'])
-    y = df['Label']
+# Function to run one selector and time it (pool task)
+def run_selector(name, X, y, max_features, options=None):
+    start = time.time()
+    with tracing.stage(f"select.{name}", X.shape[1], unit="features"):
+        selected = SELECTORS[name](X, y, max_features, **(options or {}))
+    return selected, time.time() - start
+
+# Function to perform feature selection
+# The selectors are independent until the union, so they run concurrently in
+# a process pool (workers=1 runs them in turn in this process). budget is the
+# wall-clock limit in seconds per selector, either one number for all or a
+# {name: seconds} dict; a selector over its budget is left out of the union
+# with a warning. Only the pool can stop a selector early, so with a budget
+# the pool is used even on a single core. sample_weight (one per row) is
+# passed to every selector. With a StageCache, each selector's result is cached
+# under cache_key (the key of the data it runs on) plus its own parameters.
+def feature_selection(X, y, max_features=100, workers=None, budget=None, rfe_options=None, sample_weight=None,
+                      random_state=None, cache=None, cache_key=None):
+    from sklearn.feature_selection import VarianceThreshold
+
+    selector = VarianceThreshold(threshold=0.01)
+    X = X.loc[:, selector.fit(X).get_support()]
+    options = {name: {"sample_weight": sample_weight} for name in SELECTORS}
+    options["mi"]["random_state"] = random_state
+    options["rfe"]["rfe_options"] = rfe_options
+    options["rfe"]["random_state"] = random_state
+
+    cached = {}
+    if cache is not None:
+        # The sample weights follow from cache_key, so only the other options go into the key
+        keys = {name: stage_key(cache_key, name, max_features,
+                                sorted((k, v) for k, v in options[name].items() if k != "sample_weight"))
+                for name in SELECTORS}
+        for name in SELECTORS:
+            found, value = cache.get("selector", keys[name])
+            if found:
+                cached[name] = value
+    names = [name for name in SELECTORS if name not in cached]
+
+    budgets = budget if isinstance(budget, dict) else {name: budget for name in SELECTORS}
+    if workers is None:
+        limited = any(budgets.get(name) is not None for name in names)
+        workers = len(names) if limited else min(len(names), os.cpu_count() or 1)
+
+    results = {}
+    if workers <= 1 or not names:
+        for name in names:
+            results[name] = run_selector(name, X, y, max_features, options.get(name))
+    else:
+        pool = multiprocessing.Pool(processes=min(workers, len(names)))
+        try:
+            start = time.time()
+            pending = {name: pool.apply_async(run_selector, (name, X, y, max_features, options.get(name)))
+                       for name in names}
+            for name, result in pending.items():
+                timeout = None if budgets.get(name) is None else max(0.0, start + budgets[name] - time.time())
+                try:
+                    results[name] = result.get(timeout)
+                except multiprocessing.TimeoutError:
+                    pass
+        finally:
+            pool.terminate()
+            pool.join()
+
+    # A selector collected late (or run in turn) may have finished after its budget
+    late = {}
+    for name in names:
+        if budgets.get(name) is not None and (name not in results or results[name][1] > budgets[name]):
+            if name in results:
+                late[name] = results.pop(name)
+            print(f"Warning: selector {name} exceeded its {budgets[name]:.1f}s budget and was dropped.")
+    if names and not results and not cached:
+        # Every selector went over budget: keep the fastest one that finished rather than select nothing
+        if not late:
+            limits = ", ".join(f"{name} {budgets[name]:g}s" for name in names)
+            print(f"Error: No feature selector finished within its budget ({limits}).")
+            sys.exit(1)
+        fastest = min(late, key=lambda name: late[name][1])
+        print(f"Warning: every selector exceeded its budget; using {fastest}, "
+              f"the fastest to finish ({late[fastest][1]:.2f}s).")
+        results[fastest] = late[fastest]
+
+    for name in SELECTORS:
+        if name in cached:
+            print(f"Selector {name}: {len(cached[name][0])} features (cached)")
+        elif name in results:
+            print(f"Selector {name}: {len(results[name][0])} features in {results[name][1]:.2f} seconds")
+            if cache is not None:
+                cache.put("selector", keys[name], results[name])
+    results.update(cached)
+
+    selected = {name: results[name][0] if name in results else [] for name in SELECTORS}
+    selected_features = set(selected["mi"]).union(set(selected["rfe"]), set(selected["lasso"]), set(selected["chi2"]))
+    # Sorted so that the truncation, and with it a cached run, is reproducible
+    return sorted(selected_features)[:max_features]
+
+# Function to sample at most max_rows rows (all rows when max_rows is None)
+def sample_rows(X, max_rows, random_state=0):
+    if max_rows is None or len(X) <= max_rows:
+        return X
+    rows = np.sort(np.random.default_rng(random_state).choice(len(X), size=max_rows, replace=False))
+    return X.iloc[rows] if hasattr(X, 'iloc') else X[rows]
+
+# Function for the mean |SHAP value| of each feature of a linear model, in closed form
+# For a linear model the interventional SHAP value of feature i is
+# coef_i * (x_i - E[x_i]), E taken over the background rows (default: X). With
+# several classes the per-class importances are summed. sample_weight weights
+# the rows of X both in E[x] and in the mean (only when X is the background).
+def linear_shap_importance(model, X, background=None, sample_weight=None):
+    X = np.asarray(X, dtype=np.float64)
+    if background is None:
+        mean = np.average(X, axis=0, weights=sample_weight)
+    else:
+        mean = np.asarray(background, dtype=np.float64).mean(axis=0)
+    centered = X - mean
+    return sum(np.average(np.abs(centered * coef), axis=0, weights=sample_weight)
+               for coef in np.atleast_2d(model.coef_))
+
+# Function to build the labelled TID x pattern table from a sparse TID matrix and a labels file
+def labelled_frame(matrix, tids, patterns, labels_file):
+    import pandas as pd
+
+    with tracing.stage("label", len(tids), unit="rows"):
+        labels = read_labels(labels_file, tids)
+        labelled = np.array([tid in labels for tid in tids.tolist()], dtype=bool)
+        if not labelled.all():
+            print(f"Dropping {int((~labelled).sum())} TIDs without a label.")
+
+        df = pd.DataFrame(matrix[labelled].toarray(), columns=patterns)
+        df.insert(0, 'TID', tids[labelled])
+        label_column = pd.Series([labels[tid] for tid in tids[labelled].tolist()], dtype=object)
+        try:
+            label_column = pd.to_numeric(label_column)  # Same label types as reading labelled.csv
+        except ValueError:
+            pass
+        df['Label'] = label_column.to_numpy()
+    return df
+
+# Function to build the labelled TID x pattern table from a sparse .npz and a labels file
+def load_sparse_labelled(npz_file, labels_file):
+    return labelled_frame(*load_sparse(npz_file), labels_file)
+
+# Function for ensemble feature selection on a labelled TID x pattern table
+# shap_method="linear" ranks by the closed-form linear attributions, "explainer"
+# by shap.Explainer; shap_rows caps the rows used as background and explained set.
+# imbalance="smote" oversamples the minority classes with synthetic rows;
+# "weights" keeps the original binary rows and gives every selector and the
+# final model balanced sample weights instead. random_state seeds SMOTE, MI,
+# RFE and row sampling. With a StageCache, every stage is cached under a key
+# chaining the table's fingerprint with the parameters up to that stage. SMOTE,
+# MI, RFE and the final model differ from run to run without a seed, so the
+# cache is only used together with random_state.
+def eslr_select(df, max_features=100, selector_budget=None, rfe_options=None, shap_method="linear",
+                shap_rows=None, imbalance="smote", random_state=None, cache=None):
+    from sklearn.linear_model import LogisticRegression
+
+    if cache is not None and random_state is None:
+        print("Note: feature-selection stages are only cached with a seed (--seed); running without the cache.")
+        cache = None
+
+    def stage(name, key, compute, items=None):
+        with tracing.stage(f"select.{name}", items):
+            return compute() if cache is None else cache.cached(name, key, compute)
+
+    balance_key = stage_key(frame_fingerprint(df) if cache is not None else None, imbalance, random_state)
 
     # Handle class imbalance
-    smote = SMOTE()
-    X, y = smote.fit_resample(X, y)
+    def balance():
+        X = df.drop(columns=['TID', 'Label'])
+        y = df['Label']
+        sample_weight = None
+        if imbalance == "smote":
+            from imblearn.over_sampling import SMOTE
+            smote = SMOTE(random_state=random_state)
+            X, y = smote.fit_resample(X, y)
+        else:
+            from sklearn.utils.class_weight import compute_sample_weight
+            sample_weight = compute_sample_weight('balanced', y)
+        return X, y, sample_weight
+    X, y, sample_weight = stage("balance", balance_key, balance, len(df))
 
     # Remove correlated features
-    X = remove_correlated_features(X)
+    corr_key = stage_key(balance_key, "correlation", 0.9)
+    X = X[stage("correlation", corr_key, lambda: list(remove_correlated_features(X).columns), X.shape[1])]
 
     # Perform Feature Selection
-    selected_features = feature_selection(X, y, max_features)
-    X_selected = X[selected_features]
+    with tracing.stage("select.selectors", X.shape[1], unit="features"):
+        selected_features = feature_selection(X, y, max_features, budget=selector_budget, rfe_options=rfe_options,
+                                              sample_weight=sample_weight, random_state=random_state,
+                                              cache=cache, cache_key=corr_key)
 
     # Compute SHAP feature importance
-    model = LogisticRegression(max_iter=10000, solver='liblinear')
-    model.fit(X_selected, y)
-    explainer = shap.Explainer(model, X_selected)
-    shap_values = explainer(X_selected)
-    feature_importance_shap = np.abs(shap_values.values).mean(axis=0)
-
-    # Rank features by SHAP importance
-    sorted_features = sorted(
-        zip(selected_features, feature_importance_shap), key=lambda x: x[1], reverse=True
-    )
-    selected_features_final = [feature for feature, _ in sorted_features[:max_features]]
-
-    # Save selected features
+    def rank():
+        X_selected = X[selected_features]
+        model = LogisticRegression(max_iter=10000, solver='liblinear', random_state=random_state)
+        model.fit(X_selected, y, sample_weight=sample_weight)
+        seed = 0 if random_state is None else random_state
+        X_shap = sample_rows(X_selected, shap_rows, seed)
+        if shap_method == "linear":
+            shap_weight = None if sample_weight is None else sample_rows(sample_weight, shap_rows, seed)
+            feature_importance_shap = linear_shap_importance(model, X_shap, sample_weight=shap_weight)
+        else:
+            import shap
+            explainer = shap.Explainer(model, X_shap)
+            shap_values = explainer(X_shap)
+            feature_importance_shap = np.abs(shap_values.values).mean(axis=0)
+
+        # Rank features by SHAP importance
+        sorted_features = sorted(
+            zip(selected_features, feature_importance_shap), key=lambda x: x[1], reverse=True
+        )
+        return [feature for feature, _ in sorted_features[:max_features]]
+    rank_key = stage_key(corr_key, selected_features, max_features, shap_method, shap_rows, random_state)
+    selected_features_final = stage("rank", rank_key, rank, len(selected_features))
+
+    if cache is not None:
+        cache.report()
+    return selected_features_final
+
+# Function to write the selected features table and feature list
+def save_selected_features(df, selected_features_final, output_csv_file, features_file="selected_features.txt"):
     selected_df = df[['TID'] + selected_features_final]
     selected_df.to_csv(output_csv_file, index=False)
 
-    # Save selected feature names to a text file
-    with open("selected_features.txt", "w") as f:
+    with open(features_file, "w") as f:
         for feature in selected_features_final:
             f.write(feature + "\n")
 
+# Function for ensemble feature selection
+def eslr_feature_selection(input_csv_file, output_csv_file, max_features=100, labels_file=None, cache_dir=None,
+                           random_state=None):
+    import pandas as pd
+
+    if input_csv_file.endswith('.npz'):
+        if labels_file is None:
+            print("Error: a labels file is required with a sparse .npz input.")
+            sys.exit(1)
+        df = load_sparse_labelled(input_csv_file, labels_file)
+    else:
+        with tracing.stage("select.load", unit="rows") as traced:
+            df = pd.read_csv(input_csv_file)
+            traced.items = len(df)
+
+    cache = StageCache(cache_dir) if cache_dir else None
+    selected_features_final = eslr_select(df, max_features, random_state=random_state, cache=cache)
+
+    # Save selected features and their names
+    save_selected_features(df, selected_features_final, output_csv_file)
+
     return selected_features_final
 
-# Function to extract patterns from the graph file
-def extract_patterns(features_file, input_file_path, output_file_path):
-    with open(features_file, 'r') as f:
-        input_list = [line.strip() for line in f.readlines()]  # Read features as a list
+# Function to extract patterns from a graph store compiled from the .fp file
+def extract_patterns_from_store(input_list, store_path):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from graph_store import GraphStore
 
-    with open(input_file_path, 'r') as file:
-        lines = file.readlines()
+    store = GraphStore(store_path)
+    position = {}
+    for i, name in enumerate(store.names):
+        if name.split():
+            position.setdefault(name.split()[0].rstrip(','), i)
 
     output_content = []
     for item in input_list:
         item_cleaned = item.strip("'")  # Clean the feature name
-        pattern_found = False
-
-        for i, line in enumerate(lines):
-            if f"t # {item_cleaned}," in line:
-                output_content.append(line.strip())
-                for j in range(i + 1, len(lines)):
-                    if lines[j].startswith("t #"):
-                        break
-                    output_content.append(lines[j].strip())
-                pattern_found = True
-                break
-
-        if not pattern_found:
+        if item_cleaned in position:
+            output_content.extend(store.graph_lines(position[item_cleaned]))
+        else:
             print(f"Pattern {item_cleaned} not found in the input file.")
+    return output_content
+
+# Function to build the pattern index of an FSG .fp file in one pass
+# Every 't # <id>, ...' header starts a block that runs up to the next 't #'
+# line; the index maps the id to the block's byte offset and length (the first
+# block wins for repeated ids).
+def build_fp_index(fp_path):
+    index = {}
+    block_id = None
+    block_start = offset = 0
+    with open(fp_path, 'rb') as file:
+        for line in file:
+            if line.startswith(b"t #"):
+                if block_id is not None:
+                    index.setdefault(block_id, (block_start, offset - block_start))
+                block_id = None
+                if line.startswith(b"t # ") and b"," in line:
+                    block_id = line[4:].split(b",", 1)[0].decode()
+                block_start = offset
+            offset += len(line)
+    if block_id is not None:
+        index.setdefault(block_id, (block_start, offset - block_start))
+    return index
+
+# Function to save the pattern index to <fp>.idx as 'id<TAB>offset<TAB>length' lines
+# after a header with the size and mtime of the .fp it describes. The file is only
+# a shortcut for later runs, so a directory that cannot be written to is not an error.
+def save_fp_index(fp_path, index):
+    stat = os.stat(fp_path)
+    try:
+        with open(fp_path + ".idx", 'w') as f:
+            f.write(f"# {stat.st_size} {stat.st_mtime_ns}\n")
+            for block_id, (start, length) in index.items():
+                f.write(f"{block_id}\t{start}\t{length}\n")
+    except OSError as error:
+        print(f"Note: could not save the pattern index {fp_path}.idx ({error.strerror}); it is rebuilt on every run.")
+
+# Function to read a saved pattern index; None when it is missing, unreadable or stale
+def read_fp_index(fp_path):
+    stat = os.stat(fp_path)
+    try:
+        with open(fp_path + ".idx", 'r') as f:
+            if f.readline().split() != ["#", str(stat.st_size), str(stat.st_mtime_ns)]:
+                return None
+            index = {}
+            for line in f:
+                block_id, start, length = line.rstrip("\n").split("\t")
+                index[block_id] = (int(start), int(length))
+            return index
+    except (OSError, ValueError):
+        return None
+
+# Function to load the pattern index of an .fp file, rebuilding (and saving) it when missing or stale
+def load_fp_index(fp_path):
+    index = read_fp_index(fp_path)
+    if index is None:
+        index = build_fp_index(fp_path)
+        save_fp_index(fp_path, index)
+    return index
+
+# Function to extract the lines of the listed patterns from the graph file or store
+# .fp files are read through their offset index, one seek (or mmap slice) per pattern.
+def extract_pattern_lines(input_list, input_file_path, use_mmap=False):
+    with tracing.stage("extract", len(input_list), unit="patterns"):
+        return _extract_pattern_lines(input_list, input_file_path, use_mmap)
+
+def _extract_pattern_lines(input_list, input_file_path, use_mmap):
+    if os.path.isdir(input_file_path):
+        return extract_patterns_from_store(input_list, input_file_path)
+
+    index = load_fp_index(input_file_path)
+    output_content = []
+    with open(input_file_path, 'rb') as file:
+        data = None
+        if use_mmap and os.path.getsize(input_file_path) > 0:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for item in input_list:
+                item_cleaned = item.strip("'")  # Clean the feature name
+                if item_cleaned not in index:
+                    print(f"Pattern {item_cleaned} not found in the input file.")
+                    continue
+                start, length = index[item_cleaned]
+                if data is not None:
+                    block = data[start:start + length]
+                else:
+                    file.seek(start)
+                    block = file.read(length)
+                text = block.decode().replace("\r\n", "\n").replace("\r", "\n")
+                if text.endswith("\n"):
+                    text = text[:-1]
+                output_content.extend(line.strip() for line in text.split("\n"))
+        finally:
+            if data is not None:
+                data.close()
+
+    return output_content
+
+# Function to extract patterns from the graph file
+def extract_patterns(features_file, input_file_path, output_file_path):
+    with open(features_file, 'r') as f:
+        input_list = [line.strip() for line in f.readlines()]  # Read features as a list
+
+    output_content = extract_pattern_lines(input_list, input_file_path)
 
     with open(output_file_path, 'w') as file:
         file.write("\n".join(output_content))
@@ -124,8 +582,8 @@ def extract_patterns(features_file, input_file_path, output_file_path):
 
 # Main execution
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python script.py <input_csv> <input_graph_file> <output_file>")
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python script.py <input_csv|input_npz> <input_graph_file> <output_file> [labels_file]")
         sys.exit(1)
 
     start_time = time.time()
@@ -133,8 +591,9 @@ if __name__ == "__main__":
     input_csv = sys.argv[1]   # Example: 'input.csv'
     input_graph_file = sys.argv[2]  # Example: 'pre_proc.fp'
     output_file = sys.argv[3]  # Example: 'disc_subg1.txt'
+    labels_file = sys.argv[4] if len(sys.argv) == 5 else None  # Needed with a .npz input
 
-    selected_features = eslr_feature_selection(input_csv, "selected_features.csv")
+    selected_features = eslr_feature_selection(input_csv, "selected_features.csv", labels_file=labels_file)
     extract_patterns("selected_features.txt", input_graph_file, output_file)
 
     print(f"Total Execution Time: {time.time() - start_time:.2f} seconds")
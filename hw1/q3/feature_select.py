@@ -1,79 +1,523 @@
-import networkx as nx
+import argparse
+import contextlib
+import math
 import numpy as np
 import sys
 import os
-from networkx.algorithms.isomorphism import GraphMatcher
+from collections import Counter
+from multiprocessing import Pool
+from compact_graph import CompactGraph, SubgraphMatcher, match_plan
+from feature_cache import FeatureCache, canonical_graph_hash, subgraph_set_hash
+from pattern_trie import PatternTrie
+import tracing
 
-def load_selected_subgraphs(subgraph_file):
-    """Load subgraphs from the given file."""
+# graph_store.py lives in hw1/ and is shared with q2
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from graph_store import GraphStore, is_store
+
+# networkx is only needed for the validation backend and is imported on first use (see _load_networkx)
+nx = None
+GraphMatcher = None
+
+# SubgraphIndex of a pool worker, shipped once through the pool initializer
+_worker_index = None
+
+def _load_networkx():
+    """Import networkx into the module on first use; returns False when it is not installed."""
+    global nx, GraphMatcher
+    if nx is None:
+        try:
+            import networkx
+            from networkx.algorithms.isomorphism import GraphMatcher as matcher
+        except ImportError:
+            return False
+        nx, GraphMatcher = networkx, matcher
+    return True
+
+def _build_graph(nodes, edges, backend):
+    """Build one graph from parsed (id, label) nodes and (u, v, weight) edges."""
+    if backend == "networkx":
+        graph = nx.Graph()
+        for node, label in nodes:
+            graph.add_node(node, label=label)
+        for u, v, w in edges:
+            graph.add_edge(u, v, weight=w)
+        return graph
+    position = {}
+    labels = []
+    for node, label in nodes:
+        if node in position:
+            labels[position[node]] = label
+        else:
+            position[node] = len(labels)
+            labels.append(label)
+    compact_edges = []
+    for u, v, w in edges:
+        for node in (u, v):
+            if node not in position:  # Edge to an undeclared node
+                position[node] = len(labels)
+                labels.append(-1)
+        compact_edges.append((position[u], position[v], w))
+    return CompactGraph.from_edges(labels, compact_edges)
+
+def _networkx_from_arrays(labels, endpoints, weights):
+    """Build an nx.Graph from graph store arrays."""
+    graph = nx.Graph()
+    for node, label in enumerate(labels.tolist()):
+        graph.add_node(node, label=label)
+    for (u, v), w in zip(endpoints.tolist(), weights.tolist()):
+        graph.add_edge(u, v, weight=w)
+    return graph
+
+def _open_store(path, backend, keep_empty=False):
+    """Open a compiled graph store as a lazy, memory-mapped graph sequence plus ids.
+
+    Empty graphs are dropped like the text loaders do (unless keep_empty);
+    only then are the graphs materialized into a list.
+    """
+    if backend == "networkx" and not _load_networkx():
+        print("Error: the networkx backend requires networkx to be installed.")
+        sys.exit(1)
+    factory = CompactGraph.from_arrays if backend == "compact" else _networkx_from_arrays
+    store = GraphStore(path, factory)
+    ids = [name.split()[0].rstrip(',') if name.split() else None for name in store.names]
+    empty = (np.diff(store.node_offsets) == 0) & (np.diff(store.edge_offsets) == 0)
+    if empty.any() and not keep_empty:
+        keep = np.flatnonzero(~empty)
+        print(f"Skipping {len(store) - len(keep)} empty graphs in {path}.")
+        return [store[i] for i in keep], [ids[i] for i in keep]
+    return store, ids
+
+def parse_transactions(lines, backend="compact", keep_empty=False):
+    """Parse t/v/u transaction lines into a list of graphs and their ids.
+
+    The id of a graph is the first token after "t #" in its header, without
+    the trailing comma (the pattern id in FSG .fp files). Transactions
+    without nodes and edges are skipped unless keep_empty, which keeps them
+    as empty graphs so that list positions are transaction indices.
+    """
+    if backend == "networkx" and not _load_networkx():
+        print("Error: the networkx backend requires networkx to be installed.")
+        sys.exit(1)
+    graphs = []
+    ids = []
+    graph_id = None
+    nodes = edges = None
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == 't':
+            if nodes is not None and (nodes or edges or keep_empty):
+                graphs.append(_build_graph(nodes, edges, backend))
+                ids.append(graph_id)
+            graph_id = parts[2].rstrip(',') if len(parts) > 2 else None
+            nodes, edges = [], []
+        elif parts[0] == 'v':
+            nodes.append((int(parts[1]), int(parts[2])))
+        elif parts[0] == 'u':
+            edges.append((int(parts[1]), int(parts[2]), int(parts[3])))
+    if nodes is not None and (nodes or edges or keep_empty):
+        graphs.append(_build_graph(nodes, edges, backend))
+        ids.append(graph_id)
+    return graphs, ids
+
+def _read_transactions(path, backend, keep_empty=False):
+    """Parse a t/v/u transaction file into a list of graphs and their ids."""
+    with open(path, 'r') as f:
+        return parse_transactions(f, backend, keep_empty)
+
+def load_selected_subgraphs(subgraph_file, backend="compact", with_ids=False):
+    """Load subgraphs from the given file.
+
+    backend is "compact" (CompactGraph) or "networkx" (nx.Graph). With
+    with_ids, the FSG pattern ids are returned as well.
+    """
     print(f"Loading subgraphs from {subgraph_file}...")
-    subgraphs = []
-    with open(subgraph_file, 'r') as f:
-        lines = f.readlines()
-        subgraph = None
-        for line in lines:
-            parts = line.strip().split()
-            if not parts:
-                continue
-            if parts[0] == 't':
-                if subgraph:
-                    subgraphs.append(subgraph)
-                subgraph = nx.Graph()
-            elif parts[0] == 'v':
-                subgraph.add_node(int(parts[1]), label=int(parts[2]))
-            elif parts[0] == 'u':
-                subgraph.add_edge(int(parts[1]), int(parts[2]), weight=int(parts[3]))
-        if subgraph:
-            subgraphs.append(subgraph)
+    with tracing.stage("load.subgraphs", unit="subgraphs") as traced:
+        if is_store(subgraph_file):
+            subgraphs, ids = _open_store(subgraph_file, backend)
+            subgraphs = list(subgraphs)
+        else:
+            subgraphs, ids = _read_transactions(subgraph_file, backend)
+        traced.items = len(subgraphs)
     print(f"Loaded {len(subgraphs)} subgraphs.")
+    if with_ids:
+        return subgraphs, ids
     return subgraphs
 
-def load_graphs(graph_file):
-    """Load graphs from a file."""
+def load_graphs(graph_file, backend="compact", keep_empty=False):
+    """Load graphs from a file or a compiled graph store directory.
+
+    backend is "compact" (CompactGraph) or "networkx" (nx.Graph). A store is
+    opened memory-mapped and graphs are built on access; slices of it are
+    passed to pool workers by path and range. With keep_empty, empty
+    transactions stay in as empty graphs, so graph positions are the
+    transaction indices FSG uses as TIDs.
+    """
     print(f"Loading graphs from {graph_file}...")
-    graphs = []
-    with open(graph_file, 'r') as f:
-        lines = f.readlines()
-        graph = None
-        for line in lines:
-            parts = line.strip().split()
-            if not parts:
-                continue
-            if parts[0] == 't':
-                if graph:
-                    graphs.append(graph)
-                graph = nx.Graph()
-            elif parts[0] == 'v':
-                graph.add_node(int(parts[1]), label=int(parts[2]))
-            elif parts[0] == 'u':
-                graph.add_edge(int(parts[1]), int(parts[2]), weight=int(parts[3]))
-        if graph:
-            graphs.append(graph)
+    with tracing.stage("load.graphs", unit="graphs") as traced:
+        if is_store(graph_file):
+            graphs, _ = _open_store(graph_file, backend, keep_empty)
+        else:
+            graphs, _ = _read_transactions(graph_file, backend, keep_empty)
+        traced.items = len(graphs)
     print(f"Loaded {len(graphs)} graphs.")
     return graphs
 
-def compute_feature_vector(graph, subgraphs):
-    """Convert a graph into a feature vector based on subgraph isomorphism."""
-    feature_vector = []
-    for subgraph in subgraphs:
-        matcher = GraphMatcher(graph, subgraph, node_match=lambda n1, n2: n1['label'] == n2['label'])
-        feature_vector.append(int(matcher.subgraph_is_isomorphic()))
+def load_tid_columns(tid_file, pattern_ids):
+    """Read the TID lists of the given patterns from an FSG .tid file.
+
+    Returns {pattern id: array of TIDs} for the ids found in the file.
+    """
+    print(f"Loading occurrence lists from {tid_file}...")
+    wanted = set(pattern_ids)
+    columns = {}
+    with open(tid_file, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] in wanted:
+                columns[parts[0]] = np.array(parts[1:], dtype=np.int64)
+    print(f"Found {len(columns)} of {len(wanted)} patterns.")
+    return columns
+
+def graph_signature(graph, edge_labels=False):
+    """Compute the label/degree invariants of a graph.
+
+    The signature is (label histogram, edge counts per unordered label pair,
+    max degree per label). Edge weights are only part of the edge keys with
+    edge_labels, since the default matcher compares node labels alone.
+    """
+    if isinstance(graph, CompactGraph):
+        labels = graph.labels.tolist()
+        label_values = labels
+        edges = graph.edges()
+        node_degrees = enumerate(graph.degrees().tolist())
+    else:
+        labels = dict(graph.nodes(data='label'))
+        label_values = labels.values()
+        edges = graph.edges(data='weight')
+        node_degrees = graph.degree()
+    label_counts = Counter(label_values)
+    edge_counts = Counter()
+    for u, v, w in edges:
+        a, b = labels[u], labels[v]
+        key = (a, b) if a <= b else (b, a)
+        edge_counts[key + (w,) if edge_labels else key] += 1
+    max_degree = {}
+    for node, degree in node_degrees:
+        label = labels[node]
+        if degree > max_degree.get(label, -1):
+            max_degree[label] = degree
+    return label_counts, edge_counts, max_degree
+
+def signature_dominated(pattern_signature, graph_signature):
+    """Check whether a pattern signature fits inside a graph signature.
+
+    If it does not, the pattern cannot be a subgraph of the graph.
+    """
+    pattern_labels, pattern_edges, pattern_degree = pattern_signature
+    graph_labels, graph_edges, graph_degree = graph_signature
+    return (all(graph_labels[label] >= count for label, count in pattern_labels.items())
+            and all(graph_edges[edge] >= count for edge, count in pattern_edges.items())
+            and all(graph_degree.get(label, -1) >= degree for label, degree in pattern_degree.items()))
+
+def _plan(subgraph, semantics):
+    """Build the CompactGraph match plan of a subgraph for the given semantics."""
+    return match_plan(subgraph, induced=semantics == "induced", edge_labels=semantics == "fsg")
+
+def _contains(graph, subgraph, plan=None, semantics="induced"):
+    """Check whether subgraph occurs in graph under the given semantics.
+
+    "induced" is node-induced subgraph isomorphism on node labels (the
+    original VF2 features); "fsg" is subgraph monomorphism on node and edge
+    labels, the containment behind FSG's support counts and .tid lists.
+    """
+    if isinstance(graph, CompactGraph):
+        return SubgraphMatcher(graph).contains(plan if plan is not None else _plan(subgraph, semantics))
+    _load_networkx()
+    if semantics == "fsg":
+        matcher = GraphMatcher(graph, subgraph, node_match=lambda n1, n2: n1['label'] == n2['label'],
+                               edge_match=lambda e1, e2: e1['weight'] == e2['weight'])
+        return matcher.subgraph_is_monomorphic()
+    matcher = GraphMatcher(graph, subgraph, node_match=lambda n1, n2: n1['label'] == n2['label'])
+    return matcher.subgraph_is_isomorphic()
+
+class SubgraphIndex:
+    """Selected subgraphs plus the indexes used to match graphs against them.
+
+    semantics is "induced" or "fsg" (see _contains). signatures holds the
+    label/degree signature of every subgraph (used when prefilter is on) and
+    plans the match plans of CompactGraph subgraphs.
+    order evaluates smaller subgraphs first. With lattice, sub_patterns[j]
+    lists the selected subgraphs directly contained in subgraph j, so a
+    graph lacking one of them cannot contain subgraph j either.
+
+    engine "plan" matches every subgraph on its own; "trie" merges the
+    CompactGraph subgraphs into a PatternTrie that yields the whole row in
+    one traversal (the lattice is not used then).
+    """
+
+    def __init__(self, subgraphs, prefilter=True, lattice=False, semantics="induced", engine="plan"):
+        self.subgraphs = subgraphs
+        self.prefilter = prefilter
+        self.semantics = semantics
+        self.edge_labels = semantics == "fsg"
+        if prefilter or lattice:
+            self.signatures = [graph_signature(subgraph, self.edge_labels) for subgraph in subgraphs]
+        else:
+            self.signatures = None
+        if all(isinstance(subgraph, CompactGraph) for subgraph in subgraphs):
+            self.plans = [_plan(subgraph, semantics) for subgraph in subgraphs]
+        else:
+            self.plans = None
+        self.sizes = [(subgraph.number_of_nodes(), subgraph.number_of_edges()) for subgraph in subgraphs]
+        self.order = sorted(range(len(subgraphs)), key=lambda j: (self.sizes[j], j))
+        self.trie = None
+        if engine == "trie":
+            if self.plans is None:
+                print("Note: the trie engine needs compact subgraphs; matching them one by one.")
+            else:
+                self.trie = PatternTrie(subgraphs, induced=semantics == "induced", edge_labels=self.edge_labels)
+                print(f"Pattern trie: {self.trie.num_nodes} code edges for {len(subgraphs)} subgraphs "
+                      f"({sum(subgraph_edges for _, subgraph_edges in self.sizes)} edges in total).")
+                lattice = False
+        self.engine = "trie" if self.trie is not None else "plan"
+        self.sub_patterns = self._build_lattice() if lattice else None
+
+    def __len__(self):
+        return len(self.subgraphs)
+
+    def _build_lattice(self):
+        """Find, for every subgraph, the selected subgraphs it directly contains."""
+        n = len(self.subgraphs)
+        rank = {j: r for r, j in enumerate(self.order)}
+        contained = [set() for _ in range(n)]
+        for b in range(n):
+            for a in range(n):
+                if rank[a] >= rank[b]:
+                    continue
+                if self.sizes[a][0] > self.sizes[b][0] or self.sizes[a][1] > self.sizes[b][1]:
+                    continue
+                if not signature_dominated(self.signatures[a], self.signatures[b]):
+                    continue
+                plan = self.plans[a] if self.plans is not None else None
+                if _contains(self.subgraphs[b], self.subgraphs[a], plan, self.semantics):
+                    contained[b].add(a)
+        # Keep only direct sub-patterns; the others are implied transitively
+        sub_patterns = []
+        for b in range(n):
+            indirect = set()
+            for c in contained[b]:
+                indirect |= contained[c]
+            sub_patterns.append(sorted(contained[b] - indirect))
+        print(f"Sub-pattern lattice: {sum(len(subs) for subs in sub_patterns)} containment links "
+              f"among {n} subgraphs.")
+        return sub_patterns
+
+def compute_feature_vector(graph, subgraphs, stats=None):
+    """Convert a graph into a feature vector based on subgraph isomorphism.
+
+    subgraphs is a list of subgraphs or a SubgraphIndex. CompactGraph inputs
+    are matched with SubgraphMatcher, nx.Graph inputs with networkx's
+    GraphMatcher. With an index, pairs are settled without the matcher when
+    the subgraph signature is not dominated by the graph's (pruned) or a
+    sub-pattern is already missing (implied). The counts are added to the
+    optional stats dict.
+    """
+    index = subgraphs if isinstance(subgraphs, SubgraphIndex) else SubgraphIndex(subgraphs, prefilter=False)
+    signature = graph_signature(graph, index.edge_labels) if index.prefilter else None
+    graph_matcher = SubgraphMatcher(graph) if isinstance(graph, CompactGraph) else None
+    feature_vector = [0] * len(index)
+    pruned = 0
+    implied = 0
+    if index.trie is not None and graph_matcher is not None:
+        pending = set()
+        for j in range(len(index)):
+            if signature is not None and not signature_dominated(index.signatures[j], signature):
+                pruned += 1
+            else:
+                pending.add(j)
+        index.trie.match(graph_matcher, feature_vector, pending)
+    for j in index.order if index.trie is None or graph_matcher is None else ():
+        if index.sub_patterns is not None and any(feature_vector[a] == 0 for a in index.sub_patterns[j]):
+            implied += 1
+            continue
+        if signature is not None and not signature_dominated(index.signatures[j], signature):
+            pruned += 1
+            continue
+        if graph_matcher is not None:
+            plan = index.plans[j] if index.plans is not None else _plan(index.subgraphs[j], index.semantics)
+            feature_vector[j] = int(graph_matcher.contains(plan))
+        else:
+            feature_vector[j] = int(_contains(graph, index.subgraphs[j], semantics=index.semantics))
+    if stats is not None:
+        stats['pairs'] = stats.get('pairs', 0) + len(index)
+        stats['pruned'] = stats.get('pruned', 0) + pruned
+        stats['implied'] = stats.get('implied', 0) + implied
     return feature_vector
 
-def generate_feature_matrix(graphs, subgraphs):
-    """Generate a feature matrix for a set of graphs."""
+def _init_worker(index):
+    """Store the subgraph index in a pool worker."""
+    global _worker_index
+    _worker_index = index
+
+def _compute_chunk(graphs):
+    """Compute the feature vectors of a chunk of graphs inside a pool worker."""
+    stats = {}
+    with tracing.stage("featurize.chunk", len(graphs), unit="graphs"):
+        rows = [compute_feature_vector(graph, _worker_index, stats) for graph in graphs]
+    return rows, stats
+
+def _compute_rows(graphs, index, num_workers, chunk_size, stats, pool=None):
+    """Compute the feature rows of all graphs, serially or in a process pool.
+
+    pool is an already running pool whose workers hold index (see
+    _init_worker); without one, a pool is started for this call.
+    """
+    if num_workers <= 1 or len(graphs) < 2:
+        return [compute_feature_vector(graph, index, stats) for graph in graphs]
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(graphs) / (num_workers * 4)))
+    chunks = [graphs[i:i + chunk_size] for i in range(0, len(graphs), chunk_size)]
+    if pool is None:
+        print(f"Using {num_workers} workers on {len(chunks)} chunks of up to {chunk_size} graphs.")
+        with Pool(num_workers, initializer=_init_worker, initargs=(index,)) as pool:
+            return _compute_rows(graphs, index, num_workers, chunk_size, stats, pool)
+    rows = []
+    for chunk_rows, chunk_stats in pool.imap(_compute_chunk, chunks):
+        rows.extend(chunk_rows)
+        for key, value in chunk_stats.items():
+            stats[key] = stats.get(key, 0) + value
+    return rows
+
+def _compute_rows_cached(graphs, index, num_workers, chunk_size, stats, cache, pool=None, lock=None):
+    """Compute feature rows, reusing cached rows of identical graphs.
+
+    Each distinct graph hash missing from the cache is featurized once, even
+    if it occurs several times in the batch, and its row is stored. lock,
+    shared by concurrent callers of one cache, is only held while the cache
+    is read and written; hashing and featurizing the misses run outside it.
+    """
+    lock = lock or contextlib.nullcontext()
+    keys = [canonical_graph_hash(graph) for graph in graphs]
+    with lock:
+        rows_by_key = cache.get_many(keys)
+    todo = {}
+    for position, key in enumerate(keys):
+        if key not in rows_by_key and key not in todo:
+            todo[key] = position
+    computed = _compute_rows([graphs[position] for position in todo.values()], index, num_workers, chunk_size, stats,
+                             pool)
+    new_rows = dict(zip(todo, computed))
+    with lock:
+        cache.put_many(new_rows)
+    rows_by_key.update(new_rows)
+    print(f"Featurized {len(todo)} distinct uncached graphs out of {len(graphs)}.")
+    with lock:
+        cache.report()
+    return [rows_by_key[key] for key in keys]
+
+def generate_feature_matrix(graphs, subgraphs, num_workers=1, chunk_size=None, prefilter=True, stats=None,
+                            lattice=True, known_columns=None, semantics="induced", engine="plan", cache=None):
+    """Generate a feature matrix for a set of graphs.
+
+    With num_workers > 1 the graphs are split into chunks and featurized in a
+    process pool. Rows are returned in the original graph order, so the result
+    is identical to the serial one. prefilter, lattice, semantics and engine
+    control the SubgraphIndex built over the subgraphs (taken from the index
+    if one is passed).
+
+    known_columns maps a column index to the array of graph positions that
+    contain that subgraph (e.g. FSG TID lists when the graphs are FSG's
+    training transactions); those columns are filled without matching, so
+    they only agree with the matched ones under semantics="fsg".
+
+    cache is an optional FeatureCache (built for the same subgraph set and
+    semantics) used for the matched rows when known_columns is not given.
+    """
     print("Generating feature matrix...")
-    feature_matrix = np.array([compute_feature_vector(graph, subgraphs) for graph in graphs])
+    with tracing.stage("featurize", len(graphs), unit="graphs", workers=num_workers):
+        return _generate_feature_matrix(graphs, subgraphs, num_workers, chunk_size, prefilter, stats, lattice,
+                                        known_columns, semantics, engine, cache)
+
+def _generate_feature_matrix(graphs, subgraphs, num_workers, chunk_size, prefilter, stats, lattice, known_columns,
+                             semantics, engine, cache):
+    if stats is None:
+        stats = {}
+    if isinstance(subgraphs, SubgraphIndex):
+        prefilter, lattice = subgraphs.prefilter, subgraphs.sub_patterns is not None
+        semantics, engine = subgraphs.semantics, subgraphs.engine
+        subgraphs = subgraphs.subgraphs if known_columns else subgraphs
+    if not known_columns:
+        if not isinstance(subgraphs, SubgraphIndex):
+            with tracing.stage("featurize.index", len(subgraphs), unit="subgraphs"):
+                subgraphs = SubgraphIndex(subgraphs, prefilter, lattice, semantics, engine)
+        index = subgraphs
+        if cache is not None:
+            rows = _compute_rows_cached(graphs, index, num_workers, chunk_size, stats, cache)
+        else:
+            rows = _compute_rows(graphs, index, num_workers, chunk_size, stats)
+        feature_matrix = np.array(rows)
+    else:
+        feature_matrix = np.zeros((len(graphs), len(subgraphs)), dtype=int)
+        for j, tids in known_columns.items():
+            if len(tids) and tids.max() >= len(graphs):
+                print(f"Warning: column {j} has TIDs beyond the {len(graphs)} loaded graphs; they are ignored.")
+                tids = tids[tids < len(graphs)]
+            feature_matrix[tids, j] = 1
+        missing = [j for j in range(len(subgraphs)) if j not in known_columns]
+        print(f"Filled {len(subgraphs) - len(missing)} of {len(subgraphs)} columns from occurrence lists.")
+        if missing:
+            with tracing.stage("featurize.index", len(missing), unit="subgraphs"):
+                index = SubgraphIndex([subgraphs[j] for j in missing], prefilter, lattice, semantics, engine)
+            rows = _compute_rows(graphs, index, num_workers, chunk_size, stats)
+            if rows:
+                feature_matrix[:, missing] = np.array(rows)
+    if stats.get('pairs') and (prefilter or lattice):
+        print(f"Pre-filter pruned {stats['pruned']} and the sub-pattern lattice settled {stats['implied']} "
+              f"of {stats['pairs']} (graph, subgraph) pairs "
+              f"({100.0 * (stats['pruned'] + stats['implied']) / stats['pairs']:.1f}% without matching).")
     return feature_matrix
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python3 convert_features.py <path_graphs> <path_discriminative_subgraphs> <path_features>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        usage="python3 feature_select.py <path_graphs> <path_discriminative_subgraphs> <path_features> [--workers N]")
+    parser.add_argument("graph_file")  # Output of preprocess.py (e.g., pre_proc.txt) or a graph store
+    parser.add_argument("subgraph_file")  # Text file or graph store
+    parser.add_argument("feature_output")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (0 = all cores, default 1)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Graphs per worker task (default: spread evenly over the workers)")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="Run the matcher on every pair instead of pruning by label/degree signatures")
+    parser.add_argument("--no-lattice", action="store_true",
+                        help="Do not skip subgraphs whose sub-patterns are missing from a graph")
+    parser.add_argument("--engine", choices=["plan", "trie"], default="plan",
+                        help="plan: match each subgraph separately (default); "
+                             "trie: match all subgraphs at once through a shared-prefix pattern trie")
+    parser.add_argument("--semantics", choices=["induced", "fsg"], default="induced",
+                        help="induced: node-induced match on node labels (default); "
+                             "fsg: subgraph match on node and edge labels, as FSG counts support")
+    parser.add_argument("--tid", default=None,
+                        help="FSG .tid file of the input graphs (when they are FSG's training transactions); "
+                             "columns of patterns listed there are filled from it instead of matching. "
+                             "Implies --semantics fsg; featurize other graphs with --semantics fsg as well")
+    parser.add_argument("--cache", default=None,
+                        help="SQLite file caching feature rows by canonical graph hash and subgraph set")
+    parser.add_argument("--cache-size", type=int, default=1000000,
+                        help="Maximum number of cached rows; least recently used rows are evicted (default 1000000)")
+    parser.add_argument("--backend", choices=["compact", "networkx"], default="compact",
+                        help="Graph representation and matcher (default: compact)")
+    parser.add_argument("--validate", action="store_true",
+                        help="Recompute the matrix with networkx and report rows that differ")
+    args = parser.parse_args()
 
-    graph_file = sys.argv[1]   # Output of preprocess.py (e.g., pre_proc.txt)
-    subgraph_file = sys.argv[2]
-    feature_output = sys.argv[3]
+    graph_file = args.graph_file
+    subgraph_file = args.subgraph_file
+    feature_output = args.feature_output
+    num_workers = args.workers if args.workers > 0 else os.cpu_count()
 
     # Check if files exist
     if not os.path.exists(graph_file):
@@ -85,11 +529,50 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # Load graphs and subgraphs
-    subgraphs = load_selected_subgraphs(subgraph_file)
-    graphs = load_graphs(graph_file)
+    subgraphs, pattern_ids = load_selected_subgraphs(subgraph_file, args.backend, with_ids=True)
+    # .tid lists count every transaction, so with --tid empty ones keep their position (as all-zero rows)
+    graphs = load_graphs(graph_file, args.backend, keep_empty=args.tid is not None)
+
+    known_columns = None
+    semantics = args.semantics
+    if args.tid:
+        if semantics != "fsg":
+            print("Note: .tid occurrence lists follow FSG containment; using --semantics fsg.")
+            semantics = "fsg"
+        if not os.path.exists(args.tid):
+            print(f"Error: TID file '{args.tid}' does not exist.")
+            sys.exit(1)
+        tid_columns = load_tid_columns(args.tid, [pid for pid in pattern_ids if pid is not None])
+        known_columns = {j: tid_columns[pid] for j, pid in enumerate(pattern_ids) if pid in tid_columns}
+
+    cache = None
+    if args.cache:
+        if known_columns:
+            print("Note: the feature cache is not used together with --tid.")
+        else:
+            cache = FeatureCache(args.cache, subgraph_set_hash(subgraphs, semantics), args.cache_size)
 
     # Compute feature matrix
-    feature_matrix = generate_feature_matrix(graphs, subgraphs)
+    feature_matrix = generate_feature_matrix(graphs, subgraphs, num_workers, args.chunk_size,
+                                             prefilter=not args.no_prefilter, lattice=not args.no_lattice,
+                                             known_columns=known_columns, semantics=semantics, engine=args.engine,
+                                             cache=cache)
+    if cache is not None:
+        cache.close()
+
+    if args.validate:
+        if not _load_networkx():
+            print("Error: --validate requires networkx to be installed.")
+            sys.exit(1)
+        reference = generate_feature_matrix([g.to_networkx() if isinstance(g, CompactGraph) else g for g in graphs],
+                                            [s.to_networkx() if isinstance(s, CompactGraph) else s for s in subgraphs],
+                                            num_workers, args.chunk_size, prefilter=False, lattice=False,
+                                            semantics=semantics)
+        mismatched = np.flatnonzero((reference != feature_matrix).any(axis=1)) if reference.size else []
+        if len(mismatched):
+            print(f"Validation failed: {len(mismatched)} rows differ from networkx, first at graph {mismatched[0]}.")
+            sys.exit(1)
+        print("Validation passed: feature matrix matches networkx.")
 
     # Save as a NumPy binary file
     np.save(feature_output, feature_matrix)
@@ -0,0 +1,109 @@
+import argparse
+import hashlib
+import json
+import os
+import socket
+import struct
+import sys
+
+import numpy as np
+
+import tracing
+
+# Every message is a 4-byte big-endian length followed by the payload
+FRAME = struct.Struct(">I")
+# A request may start with a "SET <key>" line naming the subgraph set it expects (see subgraph_set_key)
+SET_PREFIX = b"SET "
+# Exit status when the server was started on a different subgraph set or semantics
+MISMATCH_EXIT = 3
+
+
+def send_frame(stream, payload):
+    stream.write(FRAME.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def recv_frame(stream, max_bytes=None):
+    """Read one frame; returns None at a clean end of stream."""
+    header = stream.read(FRAME.size)
+    if len(header) < FRAME.size:
+        return None
+    (length,) = FRAME.unpack(header)
+    if max_bytes is not None and length > max_bytes:
+        raise ValueError(f"frame of {length} bytes exceeds the {max_bytes}-byte limit")
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("connection closed in the middle of a frame")
+    return payload
+
+
+def subgraph_set_key(subgraph_file, semantics):
+    """Hash of a subgraph file's bytes (or of every file of a graph store) and the matching semantics.
+
+    The server computes it once when it loads its set, so a client can name
+    its set without parsing the subgraphs.
+    """
+    digest = hashlib.sha1(semantics.encode())
+    if os.path.isdir(subgraph_file):
+        paths = []
+        for root, dirs, names in os.walk(subgraph_file):
+            dirs.sort()
+            paths.extend(os.path.join(root, name) for name in sorted(names))
+    else:
+        paths = [subgraph_file]
+    for path in paths:
+        digest.update(os.path.relpath(path, subgraph_file).encode() + b"\0")
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def request(socket_path, payload):
+    """Send one payload to a featurize_server.py socket and return the decoded reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        stream = connection.makefile('rwb')
+        send_frame(stream, payload)
+        reply = recv_frame(stream)
+    if reply is None:
+        raise EOFError("the server closed the connection without replying")
+    return json.loads(reply)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Featurize graphs through a running featurize_server.py.")
+    parser.add_argument("socket", help="Unix socket of the server")
+    parser.add_argument("graph_file", nargs="?", help="Graphs in the raw input format, as given to convert.sh")
+    parser.add_argument("feature_output", nargs="?", help="Output .npy feature matrix")
+    parser.add_argument("--subgraphs", default=None,
+                        help="Subgraph file the features must come from; the server refuses the batch if it "
+                             "was started on a different set")
+    parser.add_argument("--semantics", choices=["induced", "fsg"], default="induced",
+                        help="Matching semantics expected together with --subgraphs (default induced)")
+    parser.add_argument("--stats", action="store_true", help="Print the server's latency metrics instead")
+    args = parser.parse_args()
+
+    if args.stats:
+        print(json.dumps(request(args.socket, b"STATS"), indent=2))
+        sys.exit(0)
+    if args.graph_file is None or args.feature_output is None:
+        parser.error("graph_file and feature_output are required")
+    for path in (args.graph_file, args.subgraphs):
+        if path is not None and not os.path.exists(path):
+            print(f"Error: File '{path}' does not exist.")
+            sys.exit(1)
+
+    header = b""
+    if args.subgraphs is not None:
+        header = SET_PREFIX + subgraph_set_key(args.subgraphs, args.semantics).encode() + b"\n"
+    with tracing.stage("client.request", unit="graphs") as traced, open(args.graph_file, 'rb') as f:
+        reply = request(args.socket, header + f.read())
+        traced.items = len(reply.get("rows", ()))
+    if reply["status"] != "ok":
+        print(f"Error: the server answered {reply['status']}: {reply.get('error', '')}")
+        sys.exit(MISMATCH_EXIT if reply["status"] == "mismatch" else 1)
+
+    np.save(args.feature_output, np.array(reply["rows"], dtype=int).reshape(len(reply["rows"]), reply["columns"]))
+    print(f"Featurized {len(reply['rows'])} graphs in {reply['latency_ms']['total']:.1f} ms. "
+          f"Saved feature matrix as {args.feature_output}")
@@ -0,0 +1,249 @@
+import argparse
+import collections
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from multiprocessing import Pool
+
+import tracing
+from feature_cache import FeatureCache, subgraph_set_hash
+from feature_select import (SubgraphIndex, _compute_rows, _compute_rows_cached, _init_worker,
+                            load_selected_subgraphs, parse_transactions)
+from featurize_client import SET_PREFIX, recv_frame, send_frame, subgraph_set_key
+from preprocess import preprocess_lines
+
+
+class BatchMetrics:
+    """Per-batch latencies of the server, with percentiles over the most recent batches."""
+
+    def __init__(self, window=10000, log_file=None):
+        self.lock = threading.Lock()
+        self.totals = collections.deque(maxlen=window)
+        self.batches = 0
+        self.graphs = 0
+        self.busy = 0
+        self.errors = 0
+        self.log = open(log_file, 'a') if log_file else None
+
+    def record(self, graphs, latency):
+        with self.lock:
+            self.batches += 1
+            self.graphs += graphs
+            self.totals.append(latency["total"])
+            if self.log:
+                self.log.write(json.dumps({"time": time.time(), "graphs": graphs, **latency}) + "\n")
+                self.log.flush()
+        print(f"Batch {self.batches}: {graphs} graphs, queued {latency['queued']:.1f} ms, "
+              f"parse {latency['parse']:.1f} ms, featurize {latency['featurize']:.1f} ms, "
+              f"total {latency['total']:.1f} ms", file=sys.stderr)
+
+    def count(self, outcome):
+        """Count a batch answered "busy" or "error"."""
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def summary(self):
+        with self.lock:
+            totals = sorted(self.totals)
+            summary = {"batches": self.batches, "graphs": self.graphs, "busy": self.busy, "errors": self.errors}
+        if totals:
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                summary[f"{name}_ms"] = totals[min(len(totals) - 1, int(q * len(totals)))]
+            summary["max_ms"] = totals[-1]
+        return summary
+
+
+class Featurizer:
+    """Featurize graph batches against a subgraph index loaded once.
+
+    At most max_concurrent batches are featurized at a time and at most
+    max_queue more wait for a slot; further batches are answered "busy"
+    right away instead of queueing without bound. With workers > 1 the
+    batches share one process pool whose workers already hold the index.
+    set_key is the subgraph_set_key of the subgraph file and semantics the
+    index was built from; a batch naming another set is answered "mismatch".
+    """
+
+    def __init__(self, index, workers=1, max_concurrent=2, max_queue=16, cache=None, backend="compact",
+                 metrics=None, set_key=None):
+        self.index = index
+        self.set_key = set_key
+        self.workers = workers
+        self.backend = backend
+        self.cache = cache
+        self.cache_lock = threading.Lock()
+        self.slots = threading.Semaphore(max_concurrent)
+        self.admitted = 0
+        self.capacity = max_concurrent + max_queue
+        self.admission_lock = threading.Lock()
+        self.metrics = metrics or BatchMetrics()
+        self.pool = Pool(workers, initializer=_init_worker, initargs=(index,)) if workers > 1 else None
+
+    def handle(self, payload):
+        """Answer one request payload: raw graph text, optionally after a "SET <key>" line, or b"STATS"."""
+        if payload.strip() == b"STATS":
+            return {"status": "ok", "metrics": self.metrics.summary()}
+        if payload.startswith(SET_PREFIX):
+            header, _, payload = payload.partition(b"\n")
+            expected = header[len(SET_PREFIX):].strip().decode()
+            if expected != self.set_key:
+                self.metrics.count("errors")
+                return {"status": "mismatch",
+                        "error": f"the server was started on subgraph set {self.set_key}, not {expected}"}
+        with self.admission_lock:
+            if self.admitted >= self.capacity:
+                self.metrics.count("busy")
+                return {"status": "busy", "error": "too many batches in flight, retry later"}
+            self.admitted += 1
+        try:
+            start = time.perf_counter()
+            with self.slots:
+                queued = time.perf_counter()
+                return self._featurize(payload, start, queued)
+        except Exception as error:  # A bad batch must not take the server down
+            self.metrics.count("errors")
+            return {"status": "error", "error": f"{type(error).__name__}: {error}"}
+        finally:
+            with self.admission_lock:
+                self.admitted -= 1
+
+    def _featurize(self, payload, start, queued):
+        with tracing.stage("server.batch", unit="graphs") as traced:
+            lines = preprocess_lines(payload.decode().splitlines(keepends=True))
+            graphs, _ = parse_transactions(lines, self.backend)
+            traced.items = len(graphs)
+            parsed = time.perf_counter()
+            stats = {}
+            if self.cache is not None:
+                rows = _compute_rows_cached(graphs, self.index, self.workers, None, stats, self.cache, self.pool,
+                                            self.cache_lock)
+            else:
+                rows = _compute_rows(graphs, self.index, self.workers, None, stats, self.pool)
+        done = time.perf_counter()
+        latency = {"queued": (queued - start) * 1000, "parse": (parsed - queued) * 1000,
+                   "featurize": (done - parsed) * 1000, "total": (done - start) * 1000}
+        self.metrics.record(len(graphs), latency)
+        return {"status": "ok", "rows": rows, "columns": len(self.index), "latency_ms": latency}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+        if self.cache is not None:
+            self.cache.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serve the frames of one connection until the client closes it."""
+
+    def handle(self):
+        featurizer = self.server.featurizer
+        while True:
+            try:
+                payload = recv_frame(self.rfile, self.server.max_bytes)
+            except (ValueError, EOFError) as error:
+                send_frame(self.wfile, json.dumps({"status": "error", "error": str(error)}).encode())
+                return
+            if payload is None:
+                return
+            send_frame(self.wfile, json.dumps(featurizer.handle(payload)).encode())
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_socket(featurizer, socket_path, max_bytes):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # Stale socket of a previous server
+    server = _Server(socket_path, _Handler)
+    server.featurizer = featurizer
+    server.max_bytes = max_bytes
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"Listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def serve_stdio(featurizer, replies, max_bytes):
+    """Answer frames from stdin on the replies stream, one batch at a time, until stdin closes."""
+    stdin = sys.stdin.buffer
+    while True:
+        try:
+            payload = recv_frame(stdin, max_bytes)
+        except (ValueError, EOFError) as error:
+            send_frame(replies, json.dumps({"status": "error", "error": str(error)}).encode())
+            return
+        if payload is None:
+            return
+        send_frame(replies, json.dumps(featurizer.handle(payload)).encode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the subgraph index warm and featurize graph batches on request.")
+    parser.add_argument("subgraph_file")  # Text file or graph store, as for feature_select.py
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument("--socket", help="Serve length-prefixed requests on this Unix socket")
+    transport.add_argument("--stdio", action="store_true", help="Serve length-prefixed requests on stdin/stdout")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes shared by all batches (0 = all cores, default 1)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="Batches featurized at once (default 2 with --workers > 1, else 1). Featurization "
+                             "is CPU-bound Python, so concurrent batches only overlap in the worker pool; with "
+                             "--workers 1 they would share one core and the limit is forced to 1")
+    parser.add_argument("--max-queue", type=int, default=16,
+                        help="Batches waiting for a slot before new ones are answered busy (default 16)")
+    parser.add_argument("--max-bytes", type=int, default=64 << 20, help="Largest accepted request (default 64 MiB)")
+    parser.add_argument("--engine", choices=["plan", "trie"], default="plan")
+    parser.add_argument("--semantics", choices=["induced", "fsg"], default="induced")
+    parser.add_argument("--no-prefilter", action="store_true")
+    parser.add_argument("--no-lattice", action="store_true")
+    parser.add_argument("--cache", default=None, help="SQLite feature row cache, as for feature_select.py")
+    parser.add_argument("--cache-size", type=int, default=1000000)
+    parser.add_argument("--metrics-log", default=None, help="Append the latencies of every batch here as JSON lines")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.subgraph_file):
+        print(f"Error: Subgraph file '{args.subgraph_file}' does not exist.")
+        sys.exit(1)
+
+    # stdout carries the replies in --stdio mode, so progress messages go to stderr
+    replies = sys.stdout.buffer
+    if args.stdio:
+        sys.stdout = sys.stderr
+
+    start = time.time()
+    subgraphs = load_selected_subgraphs(args.subgraph_file)
+    with tracing.stage("featurize.index", len(subgraphs), unit="subgraphs"):
+        index = SubgraphIndex(subgraphs, prefilter=not args.no_prefilter, lattice=not args.no_lattice,
+                              semantics=args.semantics, engine=args.engine)
+    cache = None
+    if args.cache:
+        cache = FeatureCache(args.cache, subgraph_set_hash(subgraphs, args.semantics), args.cache_size)
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    max_concurrent = args.max_concurrent if args.max_concurrent is not None else (2 if workers > 1 else 1)
+    if workers <= 1 and max_concurrent > 1:
+        print(f"Warning: --max-concurrent {max_concurrent} needs --workers > 1 (batches would share the GIL); "
+              f"featurizing one batch at a time.", file=sys.stderr)
+        max_concurrent = 1
+    featurizer = Featurizer(index, workers, max(1, max_concurrent), max(0, args.max_queue), cache,
+                            metrics=BatchMetrics(log_file=args.metrics_log),
+                            set_key=subgraph_set_key(args.subgraph_file, args.semantics))
+    print(f"Ready in {time.time() - start:.2f} seconds with {len(index)} subgraphs.", file=sys.stderr)
+
+    try:
+        if args.stdio:
+            serve_stdio(featurizer, replies, args.max_bytes)
+        else:
+            serve_socket(featurizer, args.socket, args.max_bytes)
+    finally:
+        featurizer.close()
+        print(f"Served: {json.dumps(featurizer.metrics.summary())}", file=sys.stderr)
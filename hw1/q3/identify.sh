@@ -12,20 +12,24 @@ TRAIN_GRAPHS=$1
 TRAIN_LABELS=$2
 DISCRIMINATIVE_SUBGRAPHS=$3
 
-# Run preprocess script
-python3 preprocess.py "$TRAIN_GRAPHS"
-
-# Run FSG on preprocessed file
-./fsg.sh -s25 -t pre_proc.txt
-
-# Convert .tid to CSV
-python3 convert_tid_to_csv.py pre_proc.tid mproc_tid.csv
+# Set DEBUG_DIR to also keep the intermediate TID matrix and feature tables
+DEBUG_DIR=${DEBUG_DIR:-}
+# Set CACHE_DIR and SEED to reuse feature-selection stages across runs (the cache is not used without a seed)
+CACHE_DIR=${CACHE_DIR:-}
+SEED=${SEED:-}
+# Set Q3_TRACE to a directory to trace every stage (Chrome trace-event JSON and a summary table, see tracing.py)
+Q3_TRACE=${Q3_TRACE:-}
+if [ -n "$Q3_TRACE" ]; then
+    export Q3_TRACE
+    python3 tracing.py clear "$Q3_TRACE"
+fi
 
-# Map TID to labels
-python3 map_tid_to_labels.py mproc_tid.csv "$TRAIN_LABELS" labelled.csv
+# Preprocess, run FSG (-s25), select features and extract patterns in one process
+python3 identify_pipeline.py "$TRAIN_GRAPHS" "$TRAIN_LABELS" "$DISCRIMINATIVE_SUBGRAPHS" --support 25 \
+    ${DEBUG_DIR:+--debug-dir "$DEBUG_DIR"} ${CACHE_DIR:+--cache-dir "$CACHE_DIR"} ${SEED:+--seed "$SEED"}
 
-# Run feature selection
-python3 feature_pattern.py labelled.csv pre_proc.fp "$DISCRIMINATIVE_SUBGRAPHS"
+if [ -n "$Q3_TRACE" ]; then
+    python3 tracing.py merge "$Q3_TRACE"
+fi
 
 echo "all done!"
-   
@@ -0,0 +1,126 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from convert_tid_to_csv import read_tid_sparse, to_csr
+from feature_pattern import eslr_select, extract_pattern_lines, labelled_frame, save_selected_features
+from preprocess import preprocess_file
+from stage_cache import StageCache
+import tracing
+
+PROCESSED_GRAPH = "pre_proc.txt"
+
+
+def run_fsg(graph_file, support):
+    """Run the FSG binary on graph_file; it writes <name>.fp and <name>.tid next to it."""
+    fsg = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fsg.sh")
+    # FSG runs as a child process; its CPU time and peak RSS are traced as children_cpu_ms/children_peak_rss_mb
+    with tracing.stage("fsg", support=support):
+        result = subprocess.run([fsg, f"-s{support}", "-t", graph_file])
+    if result.returncode != 0:
+        print(f"Error: FSG failed with exit code {result.returncode}.")
+        sys.exit(1)
+    base = os.path.splitext(graph_file)[0]
+    return base + ".fp", base + ".tid"
+
+
+def identify(train_graphs, train_labels, output_file, support=25, max_features=100, debug_dir=None,
+             selector_budget=None, rfe_options=None, shap_method="linear", shap_rows=None, imbalance="smote",
+             random_state=None, cache_dir=None):
+    """Run preprocess -> FSG -> feature selection -> pattern extraction in one process.
+
+    The TID x pattern matrix and the labels are kept in memory; with
+    debug_dir, the intermediate tables of identify.sh's stages are written
+    there as well. selector_budget limits each feature selector's wall-clock
+    time in seconds; rfe_options selects the fast RFE mode (see fast_rfe).
+    shap_method and shap_rows choose how the final features are ranked and
+    imbalance how skewed labels are handled (see eslr_select). With
+    cache_dir, selection stages are reused across runs on the same table.
+    """
+    if debug_dir:
+        os.makedirs(debug_dir, exist_ok=True)
+
+    start = time.time()
+    preprocess_file(train_graphs, PROCESSED_GRAPH)
+    print(f"Preprocessed {train_graphs} in {time.time() - start:.2f} seconds")
+
+    start = time.time()
+    fp_file, tid_file = run_fsg(PROCESSED_GRAPH, support)
+    print(f"FSG finished in {time.time() - start:.2f} seconds")
+
+    start = time.time()
+    with tracing.stage("load", unit="patterns") as traced:
+        arrays = read_tid_sparse(tid_file)
+        matrix, tids, patterns = to_csr(arrays)
+        df = labelled_frame(matrix, tids, patterns, train_labels)
+        traced.items = matrix.shape[1]
+    print(f"Loaded {matrix.shape[0]} TIDs x {matrix.shape[1]} patterns in {time.time() - start:.2f} seconds")
+    if debug_dir:
+        np.savez(os.path.join(debug_dir, "mproc_tid.npz"), **arrays)
+        df.to_csv(os.path.join(debug_dir, "labelled.csv"), index=False)
+
+    start = time.time()
+    cache = StageCache(cache_dir) if cache_dir else None
+    with tracing.stage("select", df.shape[1] - 2, unit="features"):
+        selected_features = eslr_select(df, max_features, selector_budget, rfe_options, shap_method, shap_rows,
+                                        imbalance, random_state, cache)
+    print(f"Selected {len(selected_features)} features in {time.time() - start:.2f} seconds")
+    if debug_dir:
+        save_selected_features(df, selected_features, os.path.join(debug_dir, "selected_features.csv"),
+                               os.path.join(debug_dir, "selected_features.txt"))
+
+    output_content = extract_pattern_lines(selected_features, fp_file)
+    with open(output_file, 'w') as file:
+        file.write("\n".join(output_content))
+    print(f"Extracted patterns saved to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Identify discriminative subgraphs in a single process.")
+    parser.add_argument("train_graphs")
+    parser.add_argument("train_labels")
+    parser.add_argument("discriminative_subgraphs")
+    parser.add_argument("--support", type=int, default=25, help="FSG minimum support in percent (default 25)")
+    parser.add_argument("--max-features", type=int, default=100)
+    parser.add_argument("--selector-budget", type=float, default=None,
+                        help="Wall-clock seconds per feature selector; slower selectors are dropped (default: no limit)")
+    parser.add_argument("--rfe", choices=("exact", "fast"), default="exact",
+                        help="exact: step-1 RFE; fast: fractional elimination with warm-started fits")
+    parser.add_argument("--rfe-step", type=float, default=0.2, help="Fraction of features removed per fast RFE round")
+    parser.add_argument("--rfe-subsample", type=float, default=None,
+                        help="Run fast RFE on a stratified subsample (fraction of the rows)")
+    parser.add_argument("--shap", choices=("linear", "explainer"), default="linear",
+                        help="linear: closed-form linear SHAP ranking; explainer: shap.Explainer")
+    parser.add_argument("--shap-rows", type=int, default=None,
+                        help="Rank on at most this many sampled rows (default: all rows)")
+    parser.add_argument("--imbalance", choices=("smote", "weights"), default="smote",
+                        help="smote: oversample with synthetic rows; weights: balanced sample weights, original rows")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for SMOTE, MI, RFE and row sampling")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Cache feature-selection stages here (requires --seed); reruns only recompute stages "
+                             "whose inputs changed")
+    parser.add_argument("--debug-dir", default=None,
+                        help="Also write the intermediate TID matrix, labelled table and selected features here")
+    args = parser.parse_args()
+
+    for path in (args.train_graphs, args.train_labels):
+        if not os.path.exists(path):
+            print(f"Error: File '{path}' does not exist.")
+            sys.exit(1)
+
+    rfe_options = None
+    if args.rfe == "fast":
+        rfe_options = {"step": args.rfe_step, "subsample": args.rfe_subsample}
+
+    start_time = time.time()
+    with tracing.stage("identify"):
+        identify(args.train_graphs, args.train_labels, args.discriminative_subgraphs,
+                 support=args.support, max_features=args.max_features, debug_dir=args.debug_dir,
+                 selector_budget=args.selector_budget, rfe_options=rfe_options, shap_method=args.shap,
+                 shap_rows=args.shap_rows, imbalance=args.imbalance, random_state=args.seed,
+                 cache_dir=args.cache_dir)
+    print(f"Total Execution Time: {time.time() - start_time:.2f} seconds")
@@ -1,20 +1,23 @@
 import csv
 import sys
 
+import tracing
+
 def map_tid_to_txt_line(csv_file_path, txt_file_path, output_csv_path):
     # Read the text file and store its lines in a list
     with open(txt_file_path, 'r') as txt_file:
         txt_lines = txt_file.readlines()
 
     # Read the CSV file and add a new column with the mapped values
-    with open(csv_file_path, 'r') as csv_file, open(output_csv_path, 'w', newline='') as output_csv:
+    with tracing.stage("label", unit="rows") as traced, \
+            open(csv_file_path, 'r') as csv_file, open(output_csv_path, 'w', newline='') as output_csv:
         csv_reader = csv.DictReader(csv_file)
         fieldnames = csv_reader.fieldnames + ['Label']  # Add new column header
         csv_writer = csv.DictWriter(output_csv, fieldnames=fieldnames)
         
         csv_writer.writeheader()
         
-        for row in csv_reader:
+        for row in traced.count(csv_reader):
             # Extract the numerical part from the TID value
             tid_str = row['TID'].strip("'")  # Remove the single quote (if any)
             tid = int(tid_str)  # Convert to integer
@@ -27,6 +30,23 @@ def map_tid_to_txt_line(csv_file_path, txt_file_path, output_csv_path):
             
             csv_writer.writerow(row)
 
+def read_labels(txt_file_path, tids):
+    """Stream the labels file and return {tid: label} for the given TIDs.
+
+    TID n takes line n of the file; reading stops after the largest TID and
+    blank lines give no label.
+    """
+    wanted = set(int(tid) for tid in tids)
+    last = max(wanted, default=-1)
+    labels = {}
+    with open(txt_file_path, 'r') as txt_file:
+        for tid, line in enumerate(txt_file):
+            if tid > last:
+                break
+            if tid in wanted and line.strip():
+                labels[tid] = line.strip()
+    return labels
+
 if __name__ == "__main__":
     if len(sys.argv) != 4:
         print("Usage: python map_tid_to_labels.py <input_csv> <input_txt> <output_csv>")
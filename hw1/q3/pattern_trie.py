@@ -0,0 +1,122 @@
+from compact_graph import match_plan
+from dfs_code import is_connected, min_dfs_code
+
+
+class _TrieNode:
+    """One DFS-code edge of the trie and the patterns whose code passes through it."""
+
+    __slots__ = ("edge", "children", "terminals", "patterns")
+
+    def __init__(self, edge):
+        self.edge = edge
+        self.children = {}
+        self.terminals = []  # (pattern id, number of pattern edges) of codes ending here
+        self.patterns = set()  # ids of all patterns at or below this node
+
+
+class PatternTrie:
+    """All selected patterns merged into one trie of minimum DFS codes.
+
+    Patterns that share a core share a path from the root, so matching walks
+    the trie and the graph together: a partial embedding of a code prefix is
+    extended once and reused by every pattern below it, and the whole
+    feature row comes out of one traversal. One-node patterns are answered
+    from the label table; disconnected ones fall back to per-pattern plans.
+    """
+
+    def __init__(self, patterns, induced=True, edge_labels=False):
+        self.induced = induced
+        self.edge_labels = edge_labels
+        self.root = _TrieNode(None)
+        self.single = {}  # node label -> ids of one-node patterns
+        self.fallback = []  # (id, match plan) of disconnected patterns
+        self.num_nodes = 0
+        for pid, pattern in enumerate(patterns):
+            labels = pattern.labels.tolist()
+            edges = [(u, v, w if edge_labels else 0) for u, v, w in pattern.edges()]
+            if not edges and len(labels) == 1:
+                self.single.setdefault(labels[0], []).append(pid)
+            elif not is_connected(len(labels), edges):
+                self.fallback.append((pid, match_plan(pattern, induced, edge_labels)))
+            else:
+                code, _ = min_dfs_code(labels, edges)
+                self._insert(pid, code)
+
+    def _insert(self, pid, code):
+        node = self.root
+        node.patterns.add(pid)
+        for edge in code:
+            child = node.children.get(edge)
+            if child is None:
+                child = node.children[edge] = _TrieNode(edge)
+                self.num_nodes += 1
+            child.patterns.add(pid)
+            node = child
+        node.terminals.append((pid, len(code)))
+
+    def match(self, matcher, row, pending):
+        """Set row[pid] = 1 for every pending pattern found in the matcher's graph.
+
+        matcher is a SubgraphMatcher of the graph; pending is the set of
+        pattern ids still to decide and is emptied of those found.
+        """
+        labels = matcher.labels
+        adjacency = matcher.adjacency
+        edge_labels = self.edge_labels
+        induced = self.induced
+
+        for label, pids in self.single.items():
+            if label in matcher.nodes_by_label:
+                for pid in pids:
+                    if pid in pending:
+                        row[pid] = 1
+                        pending.discard(pid)
+        for pid, plan in self.fallback:
+            if pid in pending and matcher.contains(plan):
+                row[pid] = 1
+                pending.discard(pid)
+
+        image = []
+        used = set()
+
+        def induced_edges():
+            return sum(1 for a in range(len(image)) for b in range(a) if image[b] in adjacency[image[a]])
+
+        def reach(node):
+            for pid, num_edges in node.terminals:
+                if pid in pending and (not induced or induced_edges() == num_edges):
+                    row[pid] = 1
+                    pending.discard(pid)
+            for child in node.children.values():
+                if not child.patterns.isdisjoint(pending):
+                    extend(child)
+
+        def extend(child):
+            i, j, _, edge_label, to_label = child.edge
+            if j < len(image):  # Backward edge between two embedded nodes
+                w = adjacency[image[i]].get(image[j])
+                if w is not None and (not edge_labels or w == edge_label):
+                    reach(child)
+                return
+            for neighbor, w in adjacency[image[i]].items():
+                if neighbor in used or labels[neighbor] != to_label or (edge_labels and w != edge_label):
+                    continue
+                image.append(neighbor)
+                used.add(neighbor)
+                reach(child)
+                image.pop()
+                used.discard(neighbor)
+                if child.patterns.isdisjoint(pending):
+                    return
+
+        for child in self.root.children.values():
+            if child.patterns.isdisjoint(pending):
+                continue
+            for start in matcher.nodes_by_label.get(child.edge[2], ()):
+                image.append(start)
+                used.add(start)
+                extend(child)
+                image.pop()
+                used.discard(start)
+                if child.patterns.isdisjoint(pending):
+                    break
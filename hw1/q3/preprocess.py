@@ -1,86 +1,81 @@
 import sys
 import os
 
-def process_file(input_file, temp_file):
-    try:
-        with open(input_file, 'r') as infile:
-            lines = infile.readlines()
-
-        counter = 0
-        modified_lines = []
-
-        for line in lines:
-            # Replace 'e' with 'u'
-            line = line.replace('e', 'u')
-
-            # Add 't ' before every '#'
-            if '#' in line:
-                line = line.replace('#', f't # Graph {counter}', 1)
-                counter += 1
-
-            modified_lines.append(line)
-
-        with open(temp_file, 'w') as outfile:
-            outfile.writelines(modified_lines)
-
-        print(f"Intermediate file saved as {temp_file}")
+import tracing
 
-    except FileNotFoundError:
-        print(f"Error: The file '{input_file}' was not found.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+def preprocess_lines(lines):
+    """Turn raw graph lines into FSG input in a single pass.
 
-def clean_graph(temp_file, output_file):
+    Rewrites 'e' to 'u', replaces each '#' header with 't # Graph N', drops
+    duplicate edges (in either direction) within a graph and skips blank
+    lines. Only the edge set of the current graph is kept in memory.
+    """
+    counter = 0
     edges = set()
+    for line in lines:
+        if not line.strip():
+            continue
+
+        # Replace 'e' with 'u'
+        line = line.replace('e', 'u')
+
+        # Add 't ' before every '#'
+        if '#' in line:
+            line = line.replace('#', f't # Graph {counter}', 1)
+            counter += 1
+            edges = set()
+        elif line.startswith("u"):
+            parts = line.split()
+            u, v, w = int(parts[1]), int(parts[2]), int(parts[3])
+            if (u, v, w) in edges or (v, u, w) in edges:  # Prevent duplicates
+                continue
+            edges.add((u, v, w))
+
+        yield line.rstrip('\n') + '\n'
+
+def store_lines(store_path):
+    """Yield the graphs of a graph store (compiled with 'raw') as raw input lines."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    from graph_store import GraphStore
+
+    store = GraphStore(store_path)
+    for i in range(len(store)):
+        header = "# {name}" if store.name(i) else "#"
+        for line in store.graph_lines(i, header=header, edge_tag="e"):
+            yield line + '\n'
+
+def preprocess_file(input_file, output_file):
+    """Preprocess input_file into output_file; '-' stands for stdin/stdout.
+
+    input_file may also be a graph store directory.
+    """
+    if os.path.isdir(input_file):
+        infile = store_lines(input_file)
+    else:
+        infile = sys.stdin if input_file == '-' else open(input_file, 'r')
+    outfile = sys.stdout if output_file == '-' else open(output_file, 'w')
     try:
-        with open(temp_file, "r") as infile, open(output_file, "w") as outfile:
-            for line in infile:
-                if line.startswith("u"):
-                    parts = line.strip().split()
-                    u, v, w = int(parts[1]), int(parts[2]), int(parts[3])
-                    if (v, u, w) not in edges:  # Prevent duplicates
-                        edges.add((u, v, w))
-                        outfile.write(line + "\n")
-                else:
-                    outfile.write(line)
-
+        with tracing.stage("preprocess", unit="graphs") as traced:
+            outfile.writelines(traced.count(preprocess_lines(infile), lambda line: line.startswith('t #')))
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    if output_file != '-':
         print(f"Final cleaned graph saved as {output_file}")
-        
-        
-
-    except FileNotFoundError:
-        print(f"Error: The file '{temp_file}' was not found.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        
-def remove_empty_lines(input_file, output_file):
-    with open(input_file, "r") as f:
-        lines = f.readlines()
-    
-    with open(output_file, "w") as f:
-        for line in lines:
-            if line.strip():  # Only write non-empty lines
-                f.write(line)
-
-# Usage example
-
-
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python preprocess.py <arg1>")
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python preprocess.py <input_graphs|graph_store|-> [output_file|-]")
         sys.exit(1)
 
     input_filename = sys.argv[1]
-    
-    if not os.path.exists(input_filename):
+    output_filename = sys.argv[2] if len(sys.argv) == 3 else "pre_proc.txt"
+
+    if input_filename != '-' and not os.path.exists(input_filename):
         print(f"Error: File '{input_filename}' does not exist.")
         sys.exit(1)
 
-    temp_filename = "pre_test.txt"
-    output1_filename = "mid_proc.txt"
-    output_filename = "pre_proc.txt"
-
-    process_file(input_filename, temp_filename)
-    clean_graph(temp_filename, output1_filename)
-    remove_empty_lines(output1_filename,output_filename)
+    preprocess_file(input_filename, output_filename)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+
+
+def frame_fingerprint(df):
+    """Content hash of a labelled TID x pattern table (column names, dtypes and values)."""
+    digest = hashlib.sha1(repr(list(df.columns)).encode())
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        digest.update(values.dtype.str.encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def stage_key(*parts):
+    """Hash the parameters of a stage (plus the key of the stage it builds on) into a key."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class StageCache:
+    """On-disk cache of feature-selection stage results.
+
+    Each result is pickled to <directory>/<stage>-<key>.pkl, where the key
+    chains the input fingerprint with the parameters of this and every
+    earlier stage, so changing one parameter only misses the stages after
+    it. Hit and miss counts are kept for reporting.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, f"{stage}-{key}.pkl")
+
+    def get(self, stage, key):
+        """Return (True, value) for a cached result, else (False, None)."""
+        try:
+            with open(self._path(stage, key), 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def put(self, stage, key, value):
+        # Write to a temporary file first so an interrupted run leaves no partial entry
+        path = self._path(stage, key)
+        with open(path + ".tmp", 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    def cached(self, stage, key, compute):
+        """Return the cached result of a stage, computing and storing it on a miss."""
+        found, value = self.get(stage, key)
+        if not found:
+            value = compute()
+            self.put(stage, key, value)
+        return value
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        print(f"Stage cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate).")
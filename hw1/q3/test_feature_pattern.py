@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_pattern import feature_selection, remove_correlated_features
+
+
+def make_data(rows=60, columns=12, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.integers(0, 2, size=(rows, columns)), columns=[f"p{j}" for j in range(columns)])
+    y = pd.Series(np.arange(rows) % 2)
+    return X, y
+
+
+def test_selectors_over_budget_fall_back_to_fastest(capsys):
+    # Run in turn, every selector finishes but none within the budget
+    X, y = make_data()
+    selected = feature_selection(X, y, max_features=5, workers=1, budget=1e-9)
+    assert selected
+    assert set(selected) <= set(X.columns)
+    assert "the fastest to finish" in capsys.readouterr().out
+
+
+def test_no_selector_within_budget_is_an_error(capsys):
+    # In the pool a zero budget stops every selector before it returns
+    X, y = make_data()
+    with pytest.raises(SystemExit):
+        feature_selection(X, y, max_features=5, workers=2, budget={"mi": 0, "chi2": 0, "rfe": 0, "lasso": 0})
+    assert "No feature selector finished within its budget (mi 0s, chi2 0s, rfe 0s, lasso 0s)" in capsys.readouterr().out
+
+
+def test_blocked_correlation_keeps_all_constant_columns():
+    X = pd.DataFrame(np.ones((10, 5), dtype=int), columns=[f"p{j}" for j in range(5)])
+    assert list(remove_correlated_features(X, method="blocked").columns) == list(X.columns)
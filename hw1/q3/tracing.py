@@ -0,0 +1,193 @@
+import argparse
+import glob
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+# Tracing is opt-in: set Q3_TRACE to a directory and every traced process
+# appends its stage events to <dir>/events-<pid>.jsonl. Without it, stage()
+# hands back a shared no-op object and costs one attribute lookup.
+TRACE_DIR = os.environ.get("Q3_TRACE") or None
+
+_files = {}  # pid -> events file; a forked pool worker opens its own
+_files_lock = threading.Lock()
+
+
+def _rss_kb():
+    """Current RSS in KB (Linux), or None elsewhere."""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _write(event):
+    pid = os.getpid()
+    with _files_lock:
+        f = _files.get(pid)
+        if f is not None and os.fstat(f.fileno()).st_nlink == 0:
+            f.close()  # Removed by "tracing.py clear" while a long-running server kept it open
+            f = None
+        if f is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            f = _files[pid] = open(os.path.join(TRACE_DIR, f"events-{pid}.jsonl"), 'a')
+            process = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+            f.write(json.dumps({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                                "args": {"name": f"{process} ({pid})"}}) + "\n")
+        # Written per event so forked workers, which exit without atexit handlers, lose nothing
+        f.write(json.dumps(event) + "\n")
+        f.flush()
+
+
+class Stage:
+    """A traced pipeline stage; use through stage().
+
+    Records wall time, CPU time of this process and of the children reaped
+    during the stage (FSG, pool workers), RSS at the end, the peak RSS so far
+    of the process and of its children, and an item count, from which
+    items/sec is derived. items can be passed up front, assigned inside the
+    block or counted with count().
+    """
+
+    def __init__(self, name, items=None, args=None):
+        self.name = name
+        self.items = items
+        self.args = args or {}
+
+    def __enter__(self):
+        self._rss = _rss_kb()
+        self._children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._cpu = time.process_time()
+        self._start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.time_ns() - self._start
+        cpu = time.process_time() - self._cpu
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        rss = _rss_kb()
+        args = dict(self.args)
+        args.update({"cpu_ms": cpu * 1000,
+                     "children_cpu_ms": (children.ru_utime + children.ru_stime
+                                         - self._children.ru_utime - self._children.ru_stime) * 1000,
+                     "rss_mb": rss / 1024 if rss is not None else None,
+                     "rss_delta_mb": (rss - self._rss) / 1024 if rss is not None and self._rss is not None else None,
+                     "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                     "children_peak_rss_mb": children.ru_maxrss / 1024})
+        if self.items is not None:
+            args["items"] = self.items
+            args["items_per_sec"] = self.items / (duration / 1e9) if duration > 0 else None
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        _write({"name": self.name, "cat": "q3", "ph": "X", "ts": self._start / 1000, "dur": duration / 1000,
+                "pid": os.getpid(), "tid": threading.get_native_id(), "args": args})
+        return False
+
+    def count(self, iterable, predicate=None):
+        """Pass the items of iterable through, counting them (those matching predicate) into self.items."""
+        self.items = self.items or 0
+        for item in iterable:
+            if predicate is None or predicate(item):
+                self.items += 1
+            yield item
+
+
+class _NullStage:
+    """Stand-in for Stage when tracing is off."""
+
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def count(self, iterable, predicate=None):
+        return iterable
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, items=None, **args):
+    """Context manager tracing one stage when Q3_TRACE is set; extra keyword arguments are stored with it."""
+    if TRACE_DIR is None:
+        return _NULL_STAGE
+    return Stage(name, items, args)
+
+
+def load_events(directory):
+    events = []
+    for path in sorted(glob.glob(os.path.join(directory, "events-*.jsonl"))):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Torn last line of a killed process
+    return events
+
+
+def summarize(events):
+    """Aggregate the stage events by name, in order of first occurrence."""
+    rows = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        args = event["args"]
+        row = rows.setdefault(event["name"], {"stage": event["name"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                              "peak_rss_mb": 0.0, "children_peak_rss_mb": 0.0, "items": None})
+        row["calls"] += 1
+        row["wall_s"] += event["dur"] / 1e6
+        row["cpu_s"] += (args["cpu_ms"] + args["children_cpu_ms"]) / 1000
+        row["peak_rss_mb"] = max(row["peak_rss_mb"], args["peak_rss_mb"])
+        row["children_peak_rss_mb"] = max(row["children_peak_rss_mb"], args["children_peak_rss_mb"])
+        if args.get("items") is not None:
+            row["items"] = (row["items"] or 0) + args["items"]
+    for row in rows.values():
+        row["items_per_sec"] = row["items"] / row["wall_s"] if row["items"] is not None and row["wall_s"] else None
+    return list(rows.values())
+
+
+def print_summary(rows):
+    """Print one line per stage; CPU includes reaped children and peak RSS is max over the calls."""
+    print(f"{'stage':<24}{'calls':>6}{'wall (s)':>10}{'cpu (s)':>10}{'peak RSS (MB)':>15}{'children (MB)':>15}"
+          f"{'items':>10}{'items/s':>12}")
+    for row in rows:
+        items = f"{row['items']}" if row["items"] is not None else "-"
+        rate = f"{row['items_per_sec']:.1f}" if row["items_per_sec"] is not None else "-"
+        print(f"{row['stage']:<24}{row['calls']:>6}{row['wall_s']:>10.2f}{row['cpu_s']:>10.2f}"
+              f"{row['peak_rss_mb']:>15.1f}{row['children_peak_rss_mb']:>15.1f}{items:>10}{rate:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge Q3_TRACE stage events into a Chrome trace and summarize them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="Write <dir>/trace.json (chrome://tracing, Perfetto) and a summary")
+    merge.add_argument("directory")
+    merge.add_argument("--output", default=None, help="Trace file (default: <dir>/trace.json)")
+    summary = commands.add_parser("summary", help="Print the per-stage summary table only")
+    summary.add_argument("directory")
+    commands.add_parser("clear", help="Remove the events of earlier runs").add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        for path in glob.glob(os.path.join(args.directory, "events-*.jsonl")):
+            os.remove(path)
+        sys.exit(0)
+
+    events = load_events(args.directory)
+    if not events:
+        print(f"Error: No trace events in '{args.directory}'.")
+        sys.exit(1)
+    if args.command == "merge":
+        output = args.output or os.path.join(args.directory, "trace.json")
+        with open(output, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Chrome trace with {len(events)} events saved to {output}")
+    print_summary(summarize(events))